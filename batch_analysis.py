@@ -0,0 +1,240 @@
+'''
+Analyze a stream of positions offline.
+
+Reads one position per line from a file or stdin, analyzes each with the
+chosen strategy, spread over a pool of worker processes, and writes one
+JSON result per line to stdout, in input order, as soon as it is ready.
+Only a bounded number of positions are held in memory at once.
+
+A worker keeps one strategy for all the positions it analyzes, so the
+scores a memoizing strategy remembers are bounded to MEMO_SIZE, the least
+recently used forgotten first, and the choices of the adaptive strategy
+are not logged.
+
+Positions are either JSON objects, such as
+    {"game": "tippy", "next_player": "p1", "board": ["o--", "-x-", "---"]}
+    {"game": "subtract_square", "next_player": "p2", "total": 17}
+with an optional "id" copied to the result, or compact text, such as
+    t p1 o--/-x-/---
+    s p2 17
+
+Usage: python batch_analysis.py [-s STRATEGY] [-f FORMAT] [-w WORKERS] [-k K]
+                                [FILE]
+'''
+import json
+import sys
+import time
+from collections import deque
+from persistent_cache import LRUCache
+from subtract_square_state import SubtractSquareState
+from tippy_game_state import TippyGameState
+
+# strategies by the letters game_view uses for them
+STRATEGIES = {'r': ('strategy_random', 'StrategyRandom'),
+              'm': ('strategy_minimax', 'StrategyMinimax'),
+              'z': ('strategy_minimax_memoize', 'StrategyMinimaxMemoize'),
+              'p': ('strategy_minimax_prune', 'StrategyMinimaxPrune'),
+              'y': ('strategy_minimax_myopic', 'StrategyMinimaxMyopic'),
+              'n': ('strategy_proof_number', 'StrategyProofNumber'),
+              'a': ('strategy_adaptive', 'StrategyAdaptive')}
+
+# most scores the memoizing strategy of a worker remembers
+MEMO_SIZE = 100000
+
+
+def parse_position(line, fmt='jsonl'):
+    '''(str, str) -> (GameState, object)
+
+    Return the position described by line, in format fmt, either 'jsonl' or
+    'text', and its id, or None if it has none.
+
+    >>> s, i = parse_position('{"game": "subtract_square", '
+    ...                       '"next_player": "p2", "total": 17, "id": 4}')
+    >>> s, i
+    (SubtractSquareState('p2', False, 17), 4)
+    >>> t, i = parse_position('t p1 o--/-x-/---', 'text')
+    >>> print(t)
+    Next player: p1
+    Current board:
+    o - -
+    - x -
+    - - -
+    '''
+    if fmt == 'jsonl':
+        obj = json.loads(line)
+        game, player, ident = obj['game'], obj['next_player'], obj.get('id')
+        data = obj['board'] if game in ('t', 'tippy') else obj['total']
+    else:
+        game, player, data = line.split()
+        ident = None
+    if game in ('t', 'tippy'):
+        rows = data.split('/') if isinstance(data, str) else data
+        board = [list(row) for row in rows]
+        return (TippyGameState(player, dimension=len(board), board=board),
+                ident)
+    elif game in ('s', 'subtract_square'):
+        return SubtractSquareState(player, current_total=int(data)), ident
+    raise ValueError('unknown game {}'.format(repr(game)))
+
+
+def analyze(state, strategy, k=1):
+    '''(GameState, Strategy, int) -> dict
+
+    Return the value of state for its next player under strategy, the move
+    strategy suggests, the number of states strategy searched and the time
+    it took. The value is None if strategy does not score states, and the
+    number of states None if strategy does not count them. If k > 1 and
+    strategy has a root_search method, the k best moves and their values
+    are also returned, best first.
+
+    >>> from strategy_minimax_prune import StrategyMinimaxPrune
+    >>> s = SubtractSquareState('p1', current_total=20)
+    >>> r = analyze(s, StrategyMinimaxPrune())
+    >>> r['value'], r['move'], r['nodes']
+    (-0.995009990004999, 'SubtractSquareMove(1)', 27)
+    >>> s = SubtractSquareState('p2', current_total=13)
+    >>> analyze(s, StrategyMinimaxPrune(), 2)['lines']
+    [[0.994014980014994, 'SubtractSquareMove(1)'], \
+[-0.999, 'SubtractSquareMove(9)']]
+    '''
+    start = time.perf_counter()
+    before = getattr(strategy, 'nodes', None)
+    lines = None
+    if state.over:
+        value, move = state.outcome(), None
+    elif hasattr(strategy, 'root_search'):
+        lines = strategy.root_search(state, k)
+        value, move = lines[0]
+    elif hasattr(strategy, 'find_score'):
+        # score the moves as the minimax strategies' suggest_move does
+        value, move = None, None
+        for m in state.possible_next_moves():
+            score = -strategy.find_score(state.apply_move(m))
+            if value is None or score > value:
+                value, move = score, m
+    else:
+        value, move = None, strategy.suggest_move(state)
+    result = {'value': value, 'move': None if move is None else repr(move),
+              'nodes': None if before is None else strategy.nodes - before,
+              'seconds': round(time.perf_counter() - start, 6)}
+    if k > 1 and lines is not None:
+        result['lines'] = [[score, repr(m)] for (score, m) in lines]
+    return result
+
+
+# the strategy of this worker process, the input format and the number of
+# best moves to report
+_worker = None
+
+
+def _init_worker(letter, fmt, k=1):
+    '''(str, str, int) -> NoneType
+
+    Create the strategy of this worker process.
+    '''
+    global _worker
+    _worker = (_make_strategy(letter), fmt, k)
+
+
+def _make_strategy(letter):
+    '''(str) -> Strategy
+
+    Return a new strategy of the kind named by letter, whose memory does
+    not grow with the number of positions it analyzes.
+
+    >>> len(_make_strategy('a').log), _make_strategy('z').ms_dict.capacity
+    (0, 100000)
+    '''
+    module, name = STRATEGIES[letter]
+    strategy_class = getattr(__import__(module), name)
+    if letter == 'z':
+        return strategy_class(ms_dict=LRUCache(MEMO_SIZE))
+    elif letter == 'a':
+        return strategy_class(log_size=0)
+    return strategy_class()
+
+
+def _analyze_line(number, line):
+    '''(int, str) -> str
+
+    Return the JSON result of analyzing line number number with the
+    strategy of this worker process.
+    '''
+    strategy, fmt, k = _worker
+    try:
+        state, ident = parse_position(line, fmt)
+        result = analyze(state, strategy, k)
+    except Exception as error:
+        ident, result = None, {'error': '{}: {}'.format(
+            type(error).__name__, error)}
+    head = {'line': number}
+    if ident is not None:
+        head['id'] = ident
+    head.update(result)
+    return json.dumps(head)
+
+
+def run(lines, out, letter='p', fmt='jsonl', workers=0, window=None, k=1):
+    '''(iterable of str, file, str, str, int, int, int) -> NoneType
+
+    Write to out the result of analyzing each position in lines with the
+    strategy named by letter, in order, with its k best moves if k > 1.
+    With workers > 0, analyze in that many worker processes, keeping at
+    most window positions in flight.
+
+    >>> lines = ['s p1 20', '', 't p2 ooo/---/xxx', 's p1 oops']
+    >>> run(lines, sys.stdout, 'z', 'text')  # doctest: +ELLIPSIS
+    {"line": 1, "value": -0.995..., "move": "SubtractSquareMove(1)", ...}
+    {"line": 3, "value": 0.998001, "move": "TippyMove((1, 1))", "nodes": ...}
+    {"line": 4, "error": "ValueError: invalid literal for int() ..."}
+    '''
+    numbered = ((n, line) for (n, line) in enumerate(lines, 1)
+                if line.strip() and not line.startswith('#'))
+    if workers <= 0:
+        _init_worker(letter, fmt, k)
+        for (n, line) in numbered:
+            out.write(_analyze_line(n, line) + '\n')
+        return
+    from multiprocessing import Pool
+    window = 4 * workers if window is None else window
+    with Pool(workers, _init_worker, (letter, fmt, k)) as pool:
+        pending = deque()
+        for (n, line) in numbered:
+            pending.append(pool.apply_async(_analyze_line, (n, line)))
+            if len(pending) >= window:
+                out.write(pending.popleft().get() + '\n')
+        while pending:
+            out.write(pending.popleft().get() + '\n')
+
+
+def main(argv=None):
+    '''(list of str) -> NoneType
+
+    Run the command line interface with arguments argv.
+    '''
+    import argparse
+    parser = argparse.ArgumentParser(
+        description='Analyze a stream of game positions.')
+    parser.add_argument('file', nargs='?', default='-',
+                        help='file of positions, one per line; - for stdin')
+    parser.add_argument('-s', '--strategy', choices=sorted(STRATEGIES),
+                        default='p', help='strategy, by its game_view letter')
+    parser.add_argument('-f', '--format', choices=['jsonl', 'text'],
+                        default='jsonl', help='format of the positions')
+    parser.add_argument('-w', '--workers', type=int, default=0,
+                        help='worker processes; 0 to analyze in this one')
+    parser.add_argument('-k', '--lines', type=int, default=1,
+                        help='best moves to report, for strategies with a '
+                        'root_search')
+    args = parser.parse_args(argv)
+    lines = sys.stdin if args.file == '-' else open(args.file)
+    try:
+        run(lines, sys.stdout, args.strategy, args.format, args.workers,
+            k=args.lines)
+    finally:
+        if lines is not sys.stdin:
+            lines.close()
+
+
+if __name__ == '__main__':
+    main()
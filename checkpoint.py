@@ -0,0 +1,302 @@
+import os
+import pickle
+import tempfile
+import time
+from search_core import Negamax
+from transposition_table import EXACT, TranspositionTable
+
+
+def save_checkpoint(path, obj):
+    '''(str, object) -> NoneType
+
+    Write obj to file path as a pickle, atomically: it is written to a
+    temporary file beside path, flushed to disk and then renamed over
+    path, so path always holds either the old checkpoint or the new one,
+    never part of one.
+
+    >>> path = os.path.join(tempfile.mkdtemp(), 'solve.ckpt')
+    >>> save_checkpoint(path, {'nodes': 7})
+    >>> load_checkpoint(path)
+    {'nodes': 7}
+    '''
+    directory = os.path.dirname(os.path.abspath(path))
+    (fd, temp) = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(obj, f, pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, path)
+    except BaseException:
+        os.remove(temp)
+        raise
+
+
+def load_checkpoint(path):
+    '''(str) -> object
+
+    Return the object saved to file path by save_checkpoint, or None if
+    there is no such file.
+
+    Only load checkpoints this program wrote: unpickling a file can run
+    arbitrary code.
+
+    >>> load_checkpoint(os.path.join(tempfile.mkdtemp(), 'none.ckpt')) \\
+    ...     is None
+    True
+    '''
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+class _LoggedWrites:
+    '''
+    Stands in for the memo of a Negamax search or the table of an AlphaBeta
+    search, passing everything on to it and keeping what is written to it
+    until it is appended to a checkpoint log.
+
+    target: dict or TranspositionTable   -- the memo or table stood in for
+    pending: list of tuple               -- the writes not yet logged, as
+                                            (key, score) for a memo and
+                                            (key, score, kind, depth) for
+                                            a table
+    '''
+
+    def __init__(self, target, pending):
+        '''(_LoggedWrites, object, list of tuple) -> NoneType
+
+        Initialize _LoggedWrites self to stand in for target, with the
+        writes pending not yet logged.
+        '''
+        self.target, self.pending = target, pending
+
+    def __getattr__(self, name):
+        '''(_LoggedWrites, str) -> object
+        '''
+        return getattr(self.target, name)
+
+    def __setitem__(self, key, score):
+        '''(_LoggedWrites, object, float) -> NoneType
+        '''
+        self.target[key] = score
+        self.pending.append((key, score))
+
+    def store(self, key, score, kind=EXACT, depth=0):
+        '''(_LoggedWrites, object, float, int, int) -> NoneType
+        '''
+        self.target.store(key, score, kind, depth)
+        self.pending.append((key, score, kind, depth))
+
+
+def _replay(target, writes):
+    '''(dict or TranspositionTable, list of tuple) -> NoneType
+
+    Write to target each of writes, as kept by _LoggedWrites.
+    '''
+    for write in writes:
+        if len(write) == 2:
+            target[write[0]] = write[1]
+        else:
+            target.store(*write)
+
+
+class CheckpointedSearch:
+    '''
+    A search run in stretches, with its progress saved to a checkpoint after
+    each, so that a run that is stopped loses at most one stretch of work
+    and a later run carries on from the last checkpoint.
+
+    A checkpoint is two files. The scores the search remembers are appended
+    to the log path + '.log', each checkpoint adding only those found since
+    the one before, and then path is atomically replaced by a snapshot of
+    the rest of the search: its stack of states still being searched, its
+    counters and the length of the log it goes with. So a checkpoint costs
+    in proportion to its stretch, however much the search has remembered.
+    The memo of a Negamax search must be a dict and the table of an
+    AlphaBeta search a TranspositionTable, and their keys and the states
+    must be picklable, as those of the default key state_key are.
+
+    search: Negamax or AlphaBeta  -- the search
+    root: object                  -- key of the state searched
+    path: str                     -- checkpoint file
+    every: int                    -- states entered between checkpoints
+    saves: int                    -- checkpoints written, over all runs
+    seconds: float                -- time spent searching, over all runs
+    logged: int                   -- bytes of the log the last checkpoint
+                                     goes with
+    '''
+
+    def __init__(self, search, root, path, every=100000):
+        '''(CheckpointedSearch, Negamax, object, str, int) -> NoneType
+
+        Initialize CheckpointedSearch self to run search, a Negamax or
+        AlphaBeta search of the state with key root, saving it to path
+        every every states. The log of path is started afresh.
+        '''
+        self.search, self.root = search, root
+        self.path, self.every = path, every
+        self.saves, self.seconds, self.logged = 0, 0.0, 0
+        self._attr = 'memo' if isinstance(search, Negamax) else 'table'
+        self._empty, self._writes = None, None
+        target = getattr(search, self._attr)
+        if target is not None:
+            # what target already holds goes into the first checkpoint
+            if isinstance(target, TranspositionTable):
+                pending = [(key,) + entry
+                           for (key, entry) in target.entries.items()]
+            else:
+                pending = list(target.items())
+            self._attach(target, pending)
+        if os.path.exists(path + '.log'):
+            os.remove(path + '.log')
+
+    def _attach(self, target, pending):
+        '''(CheckpointedSearch, dict or TranspositionTable, list of tuple)
+        -> NoneType
+
+        Make self.search remember its scores in target, through a
+        _LoggedWrites with the writes pending not yet logged.
+        '''
+        self._empty = (TranspositionTable(target.max_entries)
+                       if isinstance(target, TranspositionTable)
+                       else type(target)())
+        self._writes = _LoggedWrites(target, pending)
+        setattr(self.search, self._attr, self._writes)
+
+    def __getstate__(self):
+        '''(CheckpointedSearch) -> dict
+        '''
+        state = self.__dict__.copy()
+        del state['_writes']
+        return state
+
+    def save(self):
+        '''(CheckpointedSearch) -> NoneType
+
+        Write a checkpoint of self: append the scores remembered since the
+        last one to the log of self.path, and then snapshot the rest of
+        self to self.path.
+        '''
+        writes = self._writes
+        if writes is not None:
+            with open(self.path + '.log', 'ab') as f:
+                pickle.dump(writes.pending, f, pickle.HIGHEST_PROTOCOL)
+                f.flush()
+                os.fsync(f.fileno())
+                self.logged = f.tell()
+            writes.pending = []
+        self.saves += 1
+        setattr(self.search, self._attr, None)
+        try:
+            save_checkpoint(self.path, self)
+        finally:
+            setattr(self.search, self._attr, writes)
+
+    def run(self):
+        '''(CheckpointedSearch) -> float
+
+        Run the search to the end, writing a checkpoint after each stretch
+        of self.every states and once it is finished, and return the score
+        of the root.
+
+        >>> from subtract_square_state import SubtractSquareState
+        >>> path = os.path.join(tempfile.mkdtemp(), 'solve.ckpt')
+        >>> state = SubtractSquareState('p1', current_total=1500)
+        >>> C = CheckpointedSearch(Negamax(state, memo={}), state.key(), path,
+        ...                        every=10000)
+        >>> C.run(), C.search.nodes, C.saves
+        (0.9851045463620021, 37317, 4)
+        '''
+        while True:
+            start = time.perf_counter()
+            value = self.search.run(self.every)
+            self.seconds += time.perf_counter() - start
+            self.save()
+            if value is not None:
+                return value
+
+    def memo(self):
+        '''(CheckpointedSearch) -> dict or TranspositionTable
+
+        Return the memo or table the scores of self.search are remembered
+        in, or None if there is none.
+        '''
+        return None if self._writes is None else self._writes.target
+
+    @staticmethod
+    def resume(path, every=None):
+        '''(str, int) -> CheckpointedSearch
+
+        Return the CheckpointedSearch last saved to path, to be saved to
+        path again, and every every states if every is given; or None if
+        there is no checkpoint at path.
+
+        >>> from subtract_square_state import SubtractSquareState
+        >>> path = os.path.join(tempfile.mkdtemp(), 'solve.ckpt')
+        >>> state = SubtractSquareState('p1', current_total=1500)
+        >>> C = CheckpointedSearch(Negamax(state, memo={}), state.key(), path)
+        >>> C.search.run(20000) is None
+        True
+        >>> C.save()
+        >>> len(C.memo())
+        991
+        >>> C = CheckpointedSearch.resume(path)
+        >>> len(C.memo()), C.search.nodes, C.run(), C.search.nodes
+        (991, 20001, 0.9851045463620021, 37317)
+        '''
+        checkpoint = load_checkpoint(path)
+        if checkpoint is not None:
+            checkpoint.path = path
+            if every is not None:
+                checkpoint.every = every
+            target = checkpoint._empty
+            if target is not None:
+                # the snapshot holds an empty memo or table, refilled from
+                # the log
+                # a run stopped while appending may have left part of a
+                # record past the end the checkpoint goes with
+                with open(path + '.log', 'r+b') as f:
+                    f.truncate(checkpoint.logged)
+                    while f.tell() < checkpoint.logged:
+                        _replay(target, pickle.load(f))
+                checkpoint._attach(target, [])
+            else:
+                checkpoint._writes = None
+        return checkpoint
+
+
+def solve(state, path, every=100000, memo=None):
+    '''(GameState, str, int, object) -> (float, object)
+
+    Return the score of state for its next player, found by a Negamax
+    search checkpointed to file path every every states, and the memo of
+    the scores it found, which StrategyMinimaxMemoize may be given as its
+    ms_dict. If path holds a checkpoint of a search of state, the search
+    carries on from it.
+
+    >>> from subtract_square_state import SubtractSquareState
+    >>> path = os.path.join(tempfile.mkdtemp(), 'solve.ckpt')
+    >>> state = SubtractSquareState('p1', current_total=500)
+    >>> score, memo = solve(state, path)
+    >>> score, len(memo)
+    (0.9851045463620021, 500)
+    >>> solve(SubtractSquareState('p2', current_total=499), path)
+    Traceback (most recent call last):
+    ...
+    ValueError: the checkpoint is of another search
+    '''
+    search = CheckpointedSearch.resume(path, every)
+    if search is None:
+        search = CheckpointedSearch(
+            Negamax(state, memo={} if memo is None else memo), state.key(),
+            path, every)
+    elif search.root != state.key():
+        raise ValueError('the checkpoint is of another search')
+    return search.run(), search.memo()
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
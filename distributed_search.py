@@ -0,0 +1,378 @@
+'''
+Search a game tree on several hosts at once.
+
+A Coordinator splits the search of a game state into jobs, one for each
+distinct state a few moves below it, and serves them over TCP. Workers on
+any host connect, take one job at a time, score it with a Negamax search
+remembering the scores it finds, and send back the score together with
+the scores it remembered, which the coordinator passes on to the other
+workers with their next jobs. A job held by a worker that disconnects or
+falls silent is queued again for another worker.
+
+Messages are pickles, each preceded by its length. Unpickling can run
+arbitrary code, so coordinator and workers must only be run on a trusted
+network.
+
+Usage: python distributed_search.py coordinate [-p PORT] [-s SPLIT] GAME
+       python distributed_search.py work HOST PORT
+where GAME is, as in batch_analysis, a compact text position such as
+"t p1 ----/----/----/----" or "s p1 40".
+'''
+import pickle
+import queue
+import socket
+import struct
+import threading
+from itertools import islice
+from game_state import state_key
+from search_core import negamax
+from tippy_symmetry import unique_moves
+
+_LENGTH = struct.Struct('>Q')
+
+
+def send_message(sock, obj):
+    '''(socket, object) -> NoneType
+
+    Send obj over connected socket sock, as its pickle preceded by the
+    length of the pickle.
+    '''
+    data = pickle.dumps(obj, pickle.HIGHEST_PROTOCOL)
+    sock.sendall(_LENGTH.pack(len(data)) + data)
+
+
+def receive_message(sock):
+    '''(socket) -> object
+
+    Return the next object sent over connected socket sock by
+    send_message. Raise EOFError if the connection is closed first.
+
+    >>> a, b = socket.socketpair()
+    >>> send_message(a, ('job', 0, 'state', []))
+    >>> receive_message(b)
+    ('job', 0, 'state', [])
+    >>> a.close()
+    >>> receive_message(b)
+    Traceback (most recent call last):
+    ...
+    EOFError: connection closed
+    >>> b.close()
+    '''
+    (length,) = _LENGTH.unpack(_receive_exactly(sock, _LENGTH.size))
+    return pickle.loads(_receive_exactly(sock, length))
+
+
+def _receive_exactly(sock, n):
+    '''(socket, int) -> bytes
+
+    Return the next n bytes received over sock.
+    '''
+    chunks = []
+    while n > 0:
+        chunk = sock.recv(min(n, 1 << 20))
+        if not chunk:
+            raise EOFError('connection closed')
+        chunks.append(chunk)
+        n -= len(chunk)
+    return b''.join(chunks)
+
+
+class Coordinator:
+    '''
+    Serves the jobs of a search to Workers, and combines their scores.
+
+    The jobs are the distinct states split moves below the root that the
+    game has not ended in. Once all are scored, the states above them are
+    scored by a Negamax search that stops at the jobs.
+
+    root: GameState              -- the state searched
+    key: function                -- maps a GameState to its key
+    timeout: float               -- seconds a worker may stay silent before
+                                    it is taken for dead
+    port: int                    -- port the coordinator listens on
+    jobs: queue.Queue            -- states waiting for a worker, with their
+                                    job numbers
+    scores: dict of {object: float}
+                                 -- key of each job's state to its score
+                                    for the state's next player
+    cache: dict of {object: float}
+                                 -- every score the workers remembered
+    requeued: int                -- jobs queued again after their worker
+                                    was lost
+    '''
+
+    def __init__(self, root, split=1, host='localhost', port=0, key=state_key,
+                 timeout=10.0):
+        '''(Coordinator, GameState, int, str, int, function, float)
+        -> NoneType
+
+        Initialize Coordinator self to search root, split into the states
+        split moves below it, and start serving the jobs to workers
+        connecting to host and port; port 0 picks a free port.
+
+        Precondition: not root.over and split >= 1
+        '''
+        self.root, self.key, self.timeout = root, key, timeout
+        self.jobs, self.scores, self.cache = queue.Queue(), {}, {}
+        self.requeued = 0
+        self._states = []
+        seen = set()
+        for move in unique_moves(root):
+            self._split(root.apply_move(move), split - 1, seen)
+        for (number, state) in enumerate(self._states):
+            self.jobs.put((number, state))
+        # scores remembered by workers, in the order they arrived, so each
+        # worker is sent only those it has not yet been sent
+        self._log = []
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        if not self._states:
+            self._done.set()
+        self._server = socket.create_server((host, port))
+        self.port = self._server.getsockname()[1]
+        self._accepting = threading.Thread(target=self._accept, daemon=True)
+        self._accepting.start()
+
+    def _split(self, state, plies, seen):
+        '''(Coordinator, GameState, int, set) -> NoneType
+
+        Add to self._states the states plies moves below state that the
+        game has not ended in, leaving out those whose keys are in seen.
+        '''
+        if state.over:
+            return
+        elif plies == 0:
+            k = self.key(state)
+            if k not in seen:
+                seen.add(k)
+                self._states.append(state)
+        else:
+            for move in state.possible_next_moves():
+                self._split(state.apply_move(move), plies - 1, seen)
+
+    def __len__(self):
+        '''(Coordinator) -> int
+
+        Return the number of jobs of self.
+        '''
+        return len(self._states)
+
+    def run(self):
+        '''(Coordinator) -> (Move, float)
+
+        Serve the jobs of self until all are scored, and return the first
+        move of the best score from the root, and that score for its next
+        player.
+
+        >>> from tippy_game_state import TippyGameState
+        >>> C = Coordinator(TippyGameState('p1'), split=2)
+        >>> len(C)
+        24
+        >>> workers = [threading.Thread(target=Worker('localhost',
+        ...                                          C.port).run)
+        ...            for i in range(0, 3)]
+        >>> for worker in workers:
+        ...     worker.start()
+        >>> C.run()
+        (TippyMove((1, 1)), 0.9920279440699441)
+        >>> for worker in workers:
+        ...     worker.join()
+
+        A worker that takes a job and disconnects loses it to another.
+
+        >>> from subtract_square_state import SubtractSquareState
+        >>> C = Coordinator(SubtractSquareState('p1', current_total=300),
+        ...                 split=2)
+        >>> lost = socket.create_connection(('localhost', C.port))
+        >>> receive_message(lost)[0]
+        'job'
+        >>> lost.close()
+        >>> worker = threading.Thread(target=Worker('localhost', C.port).run)
+        >>> worker.start()
+        >>> C.run(), C.requeued
+        ((SubtractSquareMove(256), 0.9920279440699441), 1)
+        >>> worker.join()
+        '''
+        self._done.wait()
+        self._accepting.join()
+        self._server.close()
+        memo = dict(self.scores)
+        best = None
+        for move in unique_moves(self.root):
+            score = -negamax(self.root.apply_move(move), memo=memo,
+                             key=self.key)[0]
+            if best is None or score > best[1]:
+                best = (move, score)
+        return best
+
+    def _accept(self):
+        '''(Coordinator) -> NoneType
+
+        Accept workers until all jobs are scored, serving each in a thread
+        of its own.
+        '''
+        self._server.settimeout(0.1)
+        while not self._done.is_set():
+            try:
+                (conn, address) = self._server.accept()
+            except socket.timeout:
+                continue
+            threading.Thread(target=self._serve, args=(conn,),
+                             daemon=True).start()
+
+    def _serve(self, conn):
+        '''(Coordinator, socket) -> NoneType
+
+        Send jobs to the worker connected by conn one at a time until all
+        jobs are scored, queueing its job again if the worker is lost.
+        '''
+        conn.settimeout(self.timeout)
+        sent = 0
+        with conn:
+            while not self._done.is_set():
+                try:
+                    job = self.jobs.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                with self._lock:
+                    entries, sent = self._log[sent:], len(self._log)
+                try:
+                    send_message(conn, ('job', job[0], job[1], entries))
+                    reply = receive_message(conn)
+                    while reply[0] == 'alive':
+                        reply = receive_message(conn)
+                except (OSError, EOFError):
+                    self.jobs.put(job)
+                    with self._lock:
+                        self.requeued += 1
+                    return
+                self._finish(job[1], reply[2], reply[3])
+            try:
+                send_message(conn, ('stop',))
+            except OSError:
+                pass
+
+    def _finish(self, state, score, entries):
+        '''(Coordinator, GameState, float, list of (object, float))
+        -> NoneType
+
+        Record score as the score of job state, and the scores its worker
+        remembered.
+        '''
+        with self._lock:
+            self.scores[self.key(state)] = score
+            for (k, value) in entries:
+                if k not in self.cache:
+                    self.cache[k] = value
+                    self._log.append((k, value))
+            if len(self.scores) == len(self._states):
+                self._done.set()
+
+
+class Worker:
+    '''
+    Scores the jobs a Coordinator serves, until it is told to stop.
+
+    host: str                    -- host of the coordinator
+    port: int                    -- port of the coordinator
+    key: function                -- maps a GameState to its key
+    heartbeat: float             -- seconds between messages telling the
+                                    coordinator that a long job is still
+                                    being searched
+    memo: dict of {object: float}
+                                 -- scores remembered, by this worker and
+                                    by the others
+    jobs: int                    -- jobs scored
+    '''
+
+    def __init__(self, host, port, key=state_key, heartbeat=1.0):
+        '''(Worker, str, int, function, float) -> NoneType
+
+        Initialize Worker self to score the jobs of the coordinator at
+        host and port.
+        '''
+        self.host, self.port, self.key = host, port, key
+        self.heartbeat = heartbeat
+        self.memo, self.jobs = {}, 0
+
+    def run(self):
+        '''(Worker) -> NoneType
+
+        Connect to the coordinator and score its jobs until it says stop
+        or closes the connection.
+        '''
+        sock = socket.create_connection((self.host, self.port))
+        lock = threading.Lock()
+        with sock:
+            while True:
+                try:
+                    message = receive_message(sock)
+                except (OSError, EOFError):
+                    return
+                if message[0] == 'stop':
+                    return
+                (kind, number, state, entries) = message
+                self.memo.update(entries)
+                before = len(self.memo)
+                searching = threading.Event()
+                beat = threading.Thread(target=self._beat,
+                                        args=(sock, lock, searching),
+                                        daemon=True)
+                beat.start()
+                try:
+                    score = negamax(state, memo=self.memo, key=self.key)[0]
+                finally:
+                    searching.set()
+                    beat.join()
+                learned = list(islice(self.memo.items(), before, None))
+                with lock:
+                    send_message(sock, ('result', number, score, learned))
+                self.jobs += 1
+
+    def _beat(self, sock, lock, stop):
+        '''(Worker, socket, threading.Lock, threading.Event) -> NoneType
+
+        Tell the coordinator over sock every self.heartbeat seconds that
+        this worker is alive, until stop is set.
+        '''
+        while not stop.wait(self.heartbeat):
+            with lock:
+                try:
+                    send_message(sock, ('alive',))
+                except OSError:
+                    return
+
+
+def main(argv=None):
+    '''(list of str) -> NoneType
+
+    Run the command line interface with arguments argv.
+    '''
+    import argparse
+    from batch_analysis import parse_position
+    parser = argparse.ArgumentParser(
+        description='Search a game tree with workers on several hosts.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    coordinate = commands.add_parser('coordinate', help='serve the jobs')
+    coordinate.add_argument('position', help='position, in compact text')
+    coordinate.add_argument('-H', '--host', default='',
+                            help='address to listen on; all by default')
+    coordinate.add_argument('-p', '--port', type=int, default=5999)
+    coordinate.add_argument('-s', '--split', type=int, default=2,
+                            help='moves below the root to split at')
+    work = commands.add_parser('work', help='score jobs')
+    work.add_argument('host')
+    work.add_argument('port', type=int)
+    args = parser.parse_args(argv)
+    if args.command == 'coordinate':
+        state = parse_position(args.position, 'text')[0]
+        coordinator = Coordinator(state, args.split, args.host, args.port)
+        print('{} jobs on port {}'.format(len(coordinator), coordinator.port))
+        (move, score) = coordinator.run()
+        print('Best move: {}; score: {}'.format(move, score))
+    else:
+        Worker(args.host, args.port).run()
+
+
+if __name__ == '__main__':
+    main()
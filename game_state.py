@@ -16,6 +16,10 @@ class GameState:
     '''
     # assign class constants
     WIN, LOSE, DRAW = 1.0, -1.0, 0.0
+    instructions = 'Generic instructions --- fill in with subclass'
+    # states are made in great numbers by searches, so subclasses that can
+    # declare their attributes in __slots__ too, and do without a __dict__
+    __slots__ = ('next_player', 'over')
 
     def __init__(self, p, interactive=False):
         '''(GameState, str, bool) -> NoneType
@@ -26,7 +30,6 @@ class GameState:
         prerequisite - p is in {'p1', 'p2'}
         '''
         self.next_player, self.over = p, False
-        self.instructions = 'Generic instructions --- fill in with subclass'
 
     def opponent(self):
         '''(GameState) -> str
@@ -42,6 +45,20 @@ class GameState:
         else:
             return 'p1'
 
+    def key(self):
+        '''(GameState) -> object
+
+        Return a compact, hashable key of self for remembering its score.
+        States with the same key have the same outcome for their next
+        players, so a key leaves out which player is about to move wherever
+        the game treats both players alike. A subclass returns a small int
+        or bytes; the default is the text of self.
+
+        >>> GameState('p1').key() == str(GameState('p1'))
+        True
+        '''
+        return str(self)
+
     def get_move(self):
         '''(GameState) -> Move
 
@@ -75,6 +92,28 @@ class GameState:
         '''
         raise NotImplementedError('Method must be implemented in a subclass')
 
+    def forcing_moves(self):
+        ''' (GameState) -> list of Move
+
+        Return the moves from the present state that must be looked at
+        before its rough_outcome can be trusted, such as a move that wins
+        at once or one that stops the opponent from doing so. The list is
+        empty when the state is quiet, as it is unless a subclass says
+        otherwise.
+
+        >>> GameState('p1').forcing_moves()
+        []
+        '''
+        return []
+
+    def is_legal(self, move):
+        ''' (GameState, Move) -> bool
+
+        Return whether move may be made from the present state. A subclass
+        whose possible_next_moves leaves out some legal moves overrides it.
+        '''
+        return move in self.possible_next_moves()
+
     def outcome(self):
         ''' (GameState) -> float
 
@@ -96,4 +135,17 @@ class GameState:
         Return estimate of outcome based only on current state. Value
         is in interval [LOSE, WIN]
         '''
-        raise NotImplementedError('Method must be implemented in a subclass')
\ No newline at end of file
+        raise NotImplementedError('Method must be implemented in a subclass')
+
+
+def state_key(state):
+    '''(GameState) -> object
+
+    Return the key under which scores of state are remembered (refer to
+    GameState.key).
+
+    >>> from subtract_square_state import SubtractSquareState
+    >>> state_key(SubtractSquareState('p1', current_total=3))
+    3
+    '''
+    return state.key()
@@ -1,15 +1,19 @@
+from ponder import Ponderer
+
+
 class GameView:
     '''
     A game view for a two-player, sequential move, zero-sum,
     perfect-information game.
     '''
 
-    def __init__(self, state, strategy):
+    def __init__(self, state, strategy, ponder=True):
         '''(GameView, GameState.__class__,
-            Strategy.__class__) -> NoneType
+            Strategy.__class__, bool) -> NoneType
 
         Create GameView self for game described by state, where
-        computer uses given strategy.
+        computer uses given strategy. If ponder, the computer searches
+        its replies to the human's likely moves while the human thinks.
         '''
         player = input('Type c if you wish the computer to play first ')
         if player == 'c':
@@ -18,6 +22,7 @@ class GameView:
             p = 'p1'
         self.state = state(p, interactive=True)
         self.strategy = strategy(interactive=True)
+        self.ponderer = Ponderer(self.strategy) if ponder else None
 
     def play(self):
         ''' (GameView) -> NoneType
@@ -29,8 +34,10 @@ class GameView:
         print()
         while not self.state.over:
             if self.state.next_player == 'p1':
+                if self.ponderer is not None:
+                    self.ponderer.start(self.state)
                 m = self.state.get_move()
-                while not m in self.state.possible_next_moves():
+                while not self.state.is_legal(m):
                     # The move was illegal.
                     print('Illegal move: {}\nPlease try again.\n'.format(m))
                     print(self.state.instructions)
@@ -38,12 +45,18 @@ class GameView:
                     m = self.state.get_move()
                 print('You choose: {}'.format(m))
             else:
-                # The computer makes a move.
-                m = self.strategy.suggest_move(self.state)
+                # The computer makes a move, pondered if it can.
+                m = None
+                if self.ponderer is not None:
+                    m = self.ponderer.result(self.state)
+                if m is None:
+                    m = self.strategy.suggest_move(self.state)
                 print('The computer chooses: {}'.format(m))
             self.state = self.state.apply_move(m)
             print('New game state: ', str(self.state))
             print()
+        if self.ponderer is not None:
+            self.ponderer.stop()
 
         if self.state.winner('p2'):
             # p2, the computer, wins
@@ -57,24 +70,34 @@ class GameView:
 
 if __name__ == '__main__':
     from subtract_square_state import SubtractSquareState
+    from subtraction_game_state import SubtractionGameState
     from tippy_game_state import TippyGameState
-    game_state = ({'s': SubtractSquareState, 't': TippyGameState})
+    from sparse_tippy_game_state import SparseTippyGameState
+    game_state = ({'s': SubtractSquareState, 't': TippyGameState,
+                   'g': SubtractionGameState, 'b': SparseTippyGameState})
     from strategy_random import StrategyRandom
     from strategy_minimax import StrategyMinimax
     from strategy_minimax_memoize import StrategyMinimaxMemoize
     from strategy_minimax_prune import StrategyMinimaxPrune
     from strategy_minimax_myopic import StrategyMinimaxMyopic
+    from strategy_subtraction import StrategySubtraction
+    from strategy_adaptive import StrategyAdaptive
     strategy = ({'r': StrategyRandom, 'm': StrategyMinimax, 
                  'z': StrategyMinimaxMemoize, 'p': StrategyMinimaxPrune, 
-                 'y': StrategyMinimaxMyopic})
+                 'y': StrategyMinimaxMyopic, 'l': StrategySubtraction,
+                 'a': StrategyAdaptive})
     g = ''
     while not g in game_state.keys():
-        g = input('s to play Subtract Square, t to play Tippy: ')
+        g = input('s to play Subtract Square, t to play Tippy,' +
+                  ' g to play a subtraction game,' +
+                  ' b to play Tippy on a big board: ')
     s = ''
     while not s in strategy.keys():
         s = input('r for random strategy for computer,' + 
                   ' m for minimax strategy for computer: ' +
                   ' z for minimax memoize strategy for computer: ' +
                   ' p for minimax prune strategy for computer: ' +
-                  ' y for minimax myopic strategy for computer: ')
+                  ' y for minimax myopic strategy for computer: ' +
+                  ' l for subtraction game solution for computer: ' +
+                  ' a for adaptive strategy for computer: ')
     GameView(game_state[g], strategy[s]).play()
\ No newline at end of file
@@ -1,97 +1,191 @@
+from game_state import state_key
 from strategy import Strategy
-from subtract_square_state import SubtractSquareState
-from tippy_game_state import TippyGameState
+from persistent_cache import LRUCache
+
+
+class MemoizedScore:
+    '''
+    A find_score method that remembers the scores it returns, which also
+    serves as the memo of a search in search_core.
+
+    Scores are remembered under the key of the state together with the
+    other arguments of the call, such as the remaining depth of a
+    depth-limited search, so a score is only reused for the same search.
+
+    find_score: function   -- the find_score method remembered
+    key: function          -- maps a GameState to its key
+    cache: object          -- remembered scores; any object supporting get
+                              and []=
+    hits: int              -- number of scores answered from cache
+    misses: int            -- number of scores computed and remembered
+    '''
+
+    def __init__(self, find_score, key=state_key, cache=None, maxsize=100000):
+        '''(MemoizedScore, function, function, object, int) -> NoneType
+
+        Initialize MemoizedScore self to remember the scores of find_score
+        in cache, or in a new LRUCache of maxsize scores if cache is None.
+        '''
+        self.find_score, self.key = find_score, key
+        self.cache = LRUCache(maxsize) if cache is None else cache
+        self.hits = self.misses = 0
+
+    def __contains__(self, k):
+        '''(MemoizedScore, object) -> bool
+
+        Return whether a score is remembered under key k.
+        '''
+        return k in self.cache
+
+    def __getitem__(self, k):
+        '''(MemoizedScore, object) -> float
+
+        Return the score remembered under key k, counting a hit.
+        '''
+        self.hits += 1
+        return self.cache[k]
+
+    def get(self, k, default=None):
+        '''(MemoizedScore, object, object) -> float
+
+        Return the score remembered under key k, counting a hit, or default
+        if there is none.
+        '''
+        score = self.cache.get(k)
+        if score is None:
+            return default
+        self.hits += 1
+        return score
+
+    def __setitem__(self, k, score):
+        '''(MemoizedScore, object, float) -> NoneType
+
+        Remember score under key k, counting a miss.
+        '''
+        self.misses += 1
+        self.cache[k] = score
+
+    def __call__(self, state, *args, **kwargs):
+        '''(MemoizedScore, GameState, ...) -> float
+
+        Return find_score(state, *args, **kwargs), remembered or computed.
+        '''
+        k = (self.key(state),) + args + tuple(sorted(kwargs.items()))
+        score = self.cache.get(k)
+        if score is not None:
+            self.hits += 1
+            return score
+        self.misses += 1
+        score = self.find_score(state, *args, **kwargs)
+        self.cache[k] = score
+        return score
+
+
+def memoize_score(strategy, key=state_key, cache=None, maxsize=100000):
+    '''(Strategy, function, object, int) -> MemoizedScore
+
+    Make the find_score method of strategy remember its scores, and return
+    the MemoizedScore that does so. A strategy searching with search_core
+    has a memo attribute, and the MemoizedScore becomes its memo, so the
+    scores of every state searched are remembered. Otherwise the
+    MemoizedScore replaces the find_score method on strategy itself, and
+    the scores of the states find_score is called on are remembered.
+
+    >>> from strategy_minimax_myopic import StrategyMinimaxMyopic
+    >>> from subtract_square_state import SubtractSquareState
+    >>> S = StrategyMinimaxMyopic()
+    >>> M = memoize_score(S)
+    >>> S.find_score(SubtractSquareState('p1', current_total=21))
+    0.997002999
+    >>> M.hits, M.misses
+    (6, 15)
+    '''
+    memoized = MemoizedScore(strategy.find_score, key, cache, maxsize)
+    if hasattr(strategy, 'memo'):
+        strategy.memo, strategy.key = memoized, key
+    else:
+        strategy.find_score = memoized
+    return memoized
+
 
 class StrategyMemoization(Strategy):
-    
-    def __init__(self, interactive = False, moves_score_dict = {}):
+    ''' Interface to suggest the moves of another strategy, remembering the
+    scores its find_score method returns so that equivalent game positions
+    are scored only once.
+
+    strategy: Strategy         -- the strategy whose moves are suggested
+    memo: MemoizedScore        -- the remembered scores of strategy
+    '''
+
+    def __init__(self, strategy, key=state_key, cache=None, maxsize=100000):
+        '''(StrategyMemoization, Strategy, function, object, int) -> NoneType
+
+        Extends __init__ method from parent class Strategy.
+        Remember the scores of strategy under key in cache, or in a new
+        LRUCache of maxsize scores if cache is None.
+        '''
         Strategy.__init__(self)
-        self.ms_dict = moves_score_dict
-        
+        self.strategy = strategy
+        self.memo = memoize_score(strategy, key, cache, maxsize)
+
     def __repr__(self):
-            '''(StrategyMinimaxMemoize) -> str
-    
-            Return a string representation of StrategyMinimaxMemoize self
-            that evaluates to an equivalent strategy.
-    
-            >>> S = StrategyMinimaxMemoize()
-            >>> S
-            StrategyMinimaxMemoize()
-            '''
-            return 'StrategyMinimaxMemoize()'
-    
+        '''(StrategyMemoization) -> str
+
+        Return a string representation of StrategyMemoization self.
+
+        >>> from strategy_minimax import StrategyMinimax
+        >>> StrategyMemoization(StrategyMinimax())
+        StrategyMemoization(StrategyMinimax())
+        '''
+        return 'StrategyMemoization({})'.format(repr(self.strategy))
+
     def __str__(self):
-        '''(StrategyMinimaxMemoize) -> str
+        '''(StrategyMemoization) -> str
 
         Return a convenient string representation of strategy self.
 
-        >>> S = StrategyMinimaxMemoize()
-        >>> print(S)
-        StrategyMinimax()
+        >>> from strategy_minimax import StrategyMinimax
+        >>> print(StrategyMemoization(StrategyMinimax()))
+        StrategyMinimax() remembering 0 scores (0 hits, 0 misses).
         '''
-        return 'StrategyMinimaxMemoize()'  
+        return '{} remembering {} scores ({} hits, {} misses).'.format(
+            str(self.strategy), len(self.memo.cache), self.memo.hits,
+            self.memo.misses)
 
     def suggest_move(self, state):
-        '''(StrategyMinimaxMemoize, GameState) -> Move
-        
-        Returns a move that would result in a best possible outcome from the
-        present game state state using Strategy self.
-        
+        '''(StrategyMemoization, GameState) -> Move
+
+        Return the move self.strategy suggests for state.
+
         Overrides suggest_move method in parent class.
-        
-        >>> S = StrategyMinimaxMemoize()
+
+        >>> from strategy_minimax_myopic import StrategyMinimaxMyopic
+        >>> from tippy_game_state import TippyGameState
+        >>> S = StrategyMemoization(StrategyMinimaxMyopic())
         >>> b = [['o', 'o', 'o'], ['-', '-', '-'], ['x', 'x', 'x']]
         >>> t = TippyGameState('p2', board = b)
         >>> S.suggest_move(t)
         TippyMove((1, 1))
         '''
-        score_moves = []
-        for move in state.possible_next_moves():
-            score = (-1) * (self.find_score(state.apply_move(move)))
-            score_moves.append((score, move))
-        return max(score_moves, key=produce_max)[1]
-
-    # helper function for suggest_move
-    def find_score(self, state, dct):
-        '''(StrategyMinimaxMemoize, GameState) -> float
-        
-        Returns the score of the best possible outcome from the present game
-        state state using strategy self.
-        
-        >>> S = StrategyMinimaxMemoize()
-        >>> b = [['o', 'o', 'o'], ['-', 'o', '-'], ['x', 'x', 'x']]
-        >>> t1 = TippyGameState('p2', board = b)
-        >>> S.find_score(t1)
-        -1.0
+        return self.strategy.suggest_move(state)
+
+    def find_score(self, state, *args):
+        '''(StrategyMemoization, GameState, ...) -> float
+
+        Return the score self.strategy finds for state, remembering it.
+
+        >>> from strategy_minimax import StrategyMinimax
+        >>> from tippy_game_state import TippyGameState
+        >>> S = StrategyMemoization(StrategyMinimax())
         >>> b = [['o', 'o', 'o'], ['-', '-', '-'], ['x', 'x', 'x']]
-        >>> t2 = TippyGameState('p2', board = b)
-        >>> S.find_score(t2)
-        1.0
-        >>> row1 = ['x', 'x', 'x', 'x']
-        >>> row2 = ['o', 'o', 'o', 'o']
-        >>> b = [row1, row2, row1, ['o', 'o', 'o', '-']]
-        >>> t3 = TippyGameState('p1', dimension = 4, board = b)
-        >>> S.find_score(t3)
-        -0.0
+        >>> S.find_score(TippyGameState('p2', board = b))
+        0.997002999
+        >>> S.memo.misses
+        10
         '''
-        
-        if state.over:
-            return state.outcome()
-
-        else:
-            if state.__str__() not in dct:
-                dct[state.__str__()] =  max(self.find_score(state.apply_move(move), dct) * (-1) for move in state.possible_next_moves())
-            return dct[state.__str__()]
-            
-
-def produce_max(L):
-    '''(list of objects) -> object
-    
-    Return the first item in list L.
-    >>> L = ((1,'a'), (1, 'b'), (1, 'c'))
-    >>> any_max = produce_max(L)
-    >>> any_max
-    (1, 'a')
-    '''
-    return L[0]
+        return self.strategy.find_score(state, *args)
+
 
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
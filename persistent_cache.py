@@ -0,0 +1,278 @@
+import atexit
+import sqlite3
+from ast import literal_eval
+from collections import OrderedDict
+
+
+class LRUCache:
+    '''
+    A dictionary of at most capacity entries that, when full, drops the
+    entry used least recently.
+
+    capacity: int                -- maximum number of entries
+    entries: OrderedDict         -- entries, least recently used first
+    '''
+
+    def __init__(self, capacity=100000):
+        '''(LRUCache, int) -> NoneType
+
+        Initialize an empty LRUCache self of at most capacity entries.
+        '''
+        self.capacity = capacity
+        self.entries = OrderedDict()
+
+    def __len__(self):
+        '''(LRUCache) -> int
+
+        Return the number of entries in self.
+        '''
+        return len(self.entries)
+
+    def __contains__(self, key):
+        '''(LRUCache, object) -> bool
+
+        Return whether self has an entry for key.
+        '''
+        return key in self.entries
+
+    def __getitem__(self, key):
+        '''(LRUCache, object) -> object
+
+        Return the value of key, marking it as the most recently used.
+
+        >>> C = LRUCache(2)
+        >>> C['a'], C['b'] = 1, 2
+        >>> C['a']
+        1
+        >>> C['c'] = 3
+        >>> sorted(C.entries)
+        ['a', 'c']
+        '''
+        self.entries.move_to_end(key)
+        return self.entries[key]
+
+    def __setitem__(self, key, value):
+        '''(LRUCache, object, object) -> NoneType
+
+        Set the value of key, dropping the least recently used entry if self
+        is over capacity.
+        '''
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def get(self, key, default=None):
+        '''(LRUCache, object, object) -> object
+
+        Return the value of key if self has one, or else default.
+        '''
+        if key in self.entries:
+            return self[key]
+        return default
+
+
+class SQLiteCache:
+    '''
+    A dictionary of scores kept in a SQLite database file, which several
+    processes can read and write at once.
+
+    The database is in write-ahead-log mode, so readers do not block the
+    writer. Keys are stored as their repr, and may be any combination of
+    ints, strs, bytes and tuples. Writes are held back and written
+    batch_size at a time.
+
+    path: str               -- database file
+    batch_size: int         -- number of writes to hold back
+    pending: dict           -- writes not yet in the database
+    '''
+
+    def __init__(self, path, batch_size=1000):
+        '''(SQLiteCache, str, int) -> NoneType
+
+        Open, creating if need be, the SQLiteCache in file path.
+        '''
+        self.path, self.batch_size = path, batch_size
+        self.pending = {}
+        self._db = sqlite3.connect(path, timeout=30.0)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute('CREATE TABLE IF NOT EXISTS scores '
+                         '(key TEXT PRIMARY KEY, score REAL)')
+        self._db.commit()
+
+    def __len__(self):
+        '''(SQLiteCache) -> int
+
+        Return the number of scores in the database, once written.
+        '''
+        self.flush()
+        return self._db.execute('SELECT COUNT(*) FROM scores').fetchone()[0]
+
+    def get(self, key, default=None):
+        '''(SQLiteCache, object, object) -> object
+
+        Return the score of key, or default if there is none.
+        '''
+        if key in self.pending:
+            return self.pending[key]
+        row = self._db.execute('SELECT score FROM scores WHERE key = ?',
+                               (repr(key),)).fetchone()
+        return default if row is None else row[0]
+
+    def __setitem__(self, key, score):
+        '''(SQLiteCache, object, float) -> NoneType
+
+        Set the score of key, writing the held back scores if there are
+        batch_size of them.
+        '''
+        self.pending[key] = score
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        '''(SQLiteCache) -> NoneType
+
+        Write the held back scores in a single transaction.
+        '''
+        if self.pending:
+            with self._db:
+                self._db.executemany(
+                    'INSERT OR REPLACE INTO scores (key, score) VALUES (?, ?)',
+                    [(repr(k), v) for (k, v) in self.pending.items()])
+            self.pending = {}
+
+    def recent(self, n):
+        '''(SQLiteCache, int) -> list of (object, float)
+
+        Return the n keys and scores written most recently.
+        '''
+        rows = self._db.execute('SELECT key, score FROM scores '
+                                'ORDER BY rowid DESC LIMIT ?', (n,))
+        return [(literal_eval(k), v) for (k, v) in rows]
+
+    def close(self):
+        '''(SQLiteCache) -> NoneType
+
+        Write the held back scores and close the database.
+        '''
+        self.flush()
+        self._db.close()
+
+
+class TieredCache:
+    '''
+    A dictionary of scores in two tiers: a bounded LRUCache in memory over an
+    unbounded SQLiteCache on disk. It can be given as the moves to score
+    dictionary of StrategyMinimaxMemoize so that what one game learns is
+    there for the next, or for another process using the same file.
+
+    memory: LRUCache      -- the in-memory tier
+    disk: SQLiteCache     -- the on-disk tier
+    missing: LRUCache     -- keys recently found in neither tier
+    '''
+
+    def __init__(self, path, capacity=100000, batch_size=1000, warm=True):
+        '''(TieredCache, str, int, int, bool) -> NoneType
+
+        Open the TieredCache over database file path, holding up to
+        capacity scores in memory. If warm, load the most recently written
+        scores into memory. The held back writes are flushed at exit.
+
+        >>> import os, tempfile
+        >>> path = os.path.join(tempfile.mkdtemp(), 'scores.db')
+        >>> C = TieredCache(path, capacity=2)
+        >>> C['Current total: 1; next player: p2'] = 1.0
+        >>> C[(5, 2)] = -1.0
+        >>> C.close()
+        >>> C = TieredCache(path, capacity=2)
+        >>> list(C.memory.entries.items())
+        [('Current total: 1; next player: p2', 1.0), ((5, 2), -1.0)]
+        >>> C.close()
+        '''
+        self.memory = LRUCache(capacity)
+        self.disk = SQLiteCache(path, batch_size)
+        self.missing = LRUCache(capacity)
+        if warm:
+            for (key, score) in reversed(self.disk.recent(capacity)):
+                self.memory[key] = score
+        atexit.register(self.flush)
+
+    def __contains__(self, key):
+        '''(TieredCache, object) -> bool
+
+        Return whether either tier has a score for key, moving it into
+        memory if only the disk has it. A key found in neither tier is
+        remembered as missing, so asking again does not query the disk;
+        scores another process writes for it later are then not seen.
+
+        >>> import os, tempfile
+        >>> C = TieredCache(os.path.join(tempfile.mkdtemp(), 'scores.db'),
+        ...                 capacity=1)
+        >>> C['a'], C['b'] = 0.0, 1.0
+        >>> 'a' in C.memory, 'a' in C, 'a' in C.memory
+        (False, True, True)
+        >>> 'c' in C, 'c' in C.missing
+        (False, True)
+        >>> C['c'] = -1.0
+        >>> 'c' in C, 'c' in C.missing
+        (True, False)
+        >>> C.close()
+        '''
+        if key in self.memory:
+            return True
+        if key in self.missing:
+            return False
+        score = self.disk.get(key)
+        if score is None:
+            self.missing[key] = True
+            return False
+        self.memory[key] = score
+        return True
+
+    def __getitem__(self, key):
+        '''(TieredCache, object) -> float
+
+        Return the score of key.
+        '''
+        if key not in self:
+            raise KeyError(key)
+        return self.memory[key]
+
+    def get(self, key, default=None):
+        '''(TieredCache, object, object) -> object
+
+        Return the score of key, or default if neither tier has one.
+        '''
+        if key in self:
+            return self.memory[key]
+        return default
+
+    def __setitem__(self, key, score):
+        '''(TieredCache, object, float) -> NoneType
+
+        Set the score of key in both tiers.
+        '''
+        self.missing.entries.pop(key, None)
+        self.memory[key] = score
+        self.disk[key] = score
+
+    def flush(self):
+        '''(TieredCache) -> NoneType
+
+        Write the scores the disk tier has held back.
+        '''
+        self.disk.flush()
+
+    def close(self):
+        '''(TieredCache) -> NoneType
+
+        Write the scores held back and close the database.
+        '''
+        atexit.unregister(self.flush)
+        self.disk.close()
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,125 @@
+import numpy as np
+from tippy_game_state import TippyGameState
+from tippy_threats import tippy_windows
+
+# codes of the cells of a board array
+EMPTY, O, X = 0, 1, 2
+
+
+def simulate(states, playouts=1000, seed=None):
+    '''(list of GameState, int, int) -> list of (float, float, float)
+
+    Return, for each of states, the fractions of playouts uniformly random
+    moves from it that the next player wins, loses and draws. All of states
+    must be TippyGameStates of one dimension, or all SubtractSquareStates.
+    The playouts of all states run in lockstep, one move of every game at a
+    time, on arrays holding every game at once.
+
+    >>> b = [['o', 'o', 'o'], ['-', 'o', 'x'], ['x', 'x', 'x']]
+    >>> simulate([TippyGameState('p1', board=b)], 10, seed=1)
+    [(1.0, 0.0, 0.0)]
+    >>> b = [['o', 'o', 'o'], ['-', '-', '-'], ['x', 'x', 'x']]
+    >>> simulate([TippyGameState('p1', board=b)], 6, seed=1)
+    [(0.5, 0.0, 0.5)]
+    >>> from subtract_square_state import SubtractSquareState
+    >>> simulate([SubtractSquareState('p2', current_total=2)], 10, seed=1)
+    [(0.0, 1.0, 0.0)]
+    '''
+    rng = np.random.default_rng(seed)
+    if isinstance(states[0], TippyGameState):
+        results = _tippy_playouts(states, playouts, rng)
+    else:
+        results = _subtract_square_playouts(states, playouts, rng)
+    # results holds one outcome per playout, 1, -1 or 0, grouped by state
+    results = results.reshape(len(states), playouts)
+    return [(float(np.mean(r == 1)), float(np.mean(r == -1)),
+             float(np.mean(r == 0))) for r in results]
+
+
+def _tippy_playouts(states, playouts, rng):
+    '''(list of TippyGameState, int, Generator) -> ndarray
+
+    Return the outcome of playouts random playouts of each of states, for
+    the next player of each.
+    '''
+    d = states[0].dimension
+    windows, cell_windows = tippy_windows(d)
+    windows = np.array(windows, dtype=np.intp)
+    # windows of each cell, padded with a window of the extra, always empty,
+    # cell d * d
+    width = max(len(ws) for ws in cell_windows)
+    padded = np.full((d * d, width), len(windows), dtype=np.intp)
+    for cell, ws in enumerate(cell_windows):
+        padded[cell, :len(ws)] = ws
+    windows = np.vstack([windows, np.full((1, 4), d * d, dtype=np.intp)])
+
+    codes = {'-': EMPTY, 'o': O, 'x': X}
+    starts = np.array([[codes[tile] for row in s.board for tile in row] +
+                       [EMPTY] for s in states], dtype=np.int8)
+    boards = np.repeat(starts, playouts, axis=0)
+    n = len(boards)
+    mover = np.repeat(np.array([O if s.next_player == 'p1' else X
+                                for s in states], dtype=np.int8), playouts)
+    first = mover.copy()
+    results = np.zeros(n, dtype=np.int8)
+    active = np.array([not s.over for s in states]).repeat(playouts)
+    # games already over keep the outcome of their start state
+    for i, s in enumerate(states):
+        if s.over:
+            results[i * playouts:(i + 1) * playouts] = int(s.outcome())
+    rows = np.arange(n)
+    while active.any():
+        live = rows[active]
+        # a uniformly random empty cell of each live board
+        keys = rng.random((len(live), d * d))
+        keys[boards[live, :d * d] != EMPTY] = -1.0
+        cells = keys.argmax(axis=1)
+        letters = mover[live]
+        boards[live, cells] = letters
+        # only the windows through the new piece can have become a tippy
+        touched = windows[padded[cells]]
+        pieces = boards[live[:, None, None], touched]
+        won = (pieces == letters[:, None, None]).all(axis=2).any(axis=1)
+        full = (boards[live, :d * d] != EMPTY).all(axis=1)
+        winners = live[won]
+        results[winners] = np.where(mover[winners] == first[winners], 1, -1)
+        active[live[won | full]] = False
+        mover[live] = O + X - letters
+    return results
+
+
+def _subtract_square_playouts(states, playouts, rng):
+    '''(list of SubtractSquareState, int, Generator) -> ndarray
+
+    Return the outcome of playouts random playouts of each of states, for
+    the next player of each.
+    '''
+    totals = np.repeat(np.array([s.current_total for s in states],
+                                dtype=np.int64), playouts)
+    n = len(totals)
+    results = np.zeros(n, dtype=np.int8)
+    # the player who takes the last counter wins; at an even number of moves
+    # into the playout it is the first player's turn
+    first_to_move = np.ones(n, dtype=bool)
+    active = totals > 0
+    results[~active] = -1
+    rows = np.arange(n)
+    while active.any():
+        live = rows[active]
+        roots = np.floor(np.sqrt(totals[live])).astype(np.int64)
+        # correct the floating point square roots of large totals
+        roots -= roots * roots > totals[live]
+        roots += (roots + 1) * (roots + 1) <= totals[live]
+        amounts = (np.floor(rng.random(len(live)) * roots).astype(np.int64)
+                   + 1) ** 2
+        totals[live] -= amounts
+        done = live[totals[live] == 0]
+        results[done] = np.where(first_to_move[done], 1, -1)
+        active[done] = False
+        first_to_move[live] = ~first_to_move[live]
+    return results
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,140 @@
+import threading
+from game_state import state_key
+from search_core import Cancelled, stop_searches
+
+
+class Ponderer:
+    '''
+    Searches, in a background thread, the replies to the human's likely
+    moves while the human is still choosing one.
+
+    The replies are found with the same strategy that will later answer the
+    human, so the scores a caching strategy remembers while pondering are
+    reused even when the human plays an unexpected move. Pondering stops
+    at the next state the strategy's search_core search enters (refer to
+    search_core.stop_searches), so the strategy is never left part way
+    through updating what it remembers; a strategy searching otherwise
+    finishes the reply it is on first.
+
+    strategy: Strategy        -- strategy suggesting the computer's moves
+    key: function             -- maps a GameState to its key
+    results: dict             -- key of a state to the move suggested there
+    '''
+
+    def __init__(self, strategy, key=state_key):
+        '''(Ponderer, Strategy, function) -> NoneType
+
+        Initialize Ponderer self to ponder with strategy.
+        '''
+        self.strategy, self.key = strategy, key
+        self.results = {}
+        self._thread, self._current = None, None
+        self._stop = threading.Event()
+        self._changed = threading.Condition()
+
+    def start(self, state):
+        '''(Ponderer, GameState) -> NoneType
+
+        Start searching the replies to the moves from state, the human's
+        turn, beginning with the moves that look best for the human.
+        '''
+        self.stop()
+        self.results = {}
+        children = [state.apply_move(move)
+                    for move in state.possible_next_moves()]
+        # rough_outcome is from the point of view of the computer, about to
+        # move in each child, so the human's likely moves have low estimates
+        children = [child for child in children if not child.over]
+        children.sort(key=lambda child: child.rough_outcome())
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._ponder,
+                                        args=(children, self._stop),
+                                        daemon=True)
+        self._thread.start()
+
+    def _ponder(self, children, stop):
+        '''(Ponderer, list of GameState, threading.Event) -> NoneType
+
+        Suggest a move for each of children in turn, until stop is set.
+        '''
+        stop_searches(stop)
+        try:
+            for child in children:
+                k = self.key(child)
+                with self._changed:
+                    if stop.is_set():
+                        return
+                    self._current = k
+                move = self.strategy.suggest_move(child)
+                with self._changed:
+                    self.results[k] = move
+                    self._current = None
+                    self._changed.notify_all()
+        except Cancelled:
+            pass
+        finally:
+            with self._changed:
+                self._current = None
+                self._changed.notify_all()
+
+    def wait(self):
+        '''(Ponderer) -> NoneType
+
+        Wait until every reply has been searched.
+        '''
+        if self._thread is not None:
+            self._thread.join()
+
+    def result(self, state):
+        '''(Ponderer, GameState) -> Move or NoneType
+
+        Return the move pondered for state, the state the human's move led
+        to, waiting for it if it is being searched. Return None if state
+        was not pondered. Pondering stops either way.
+
+        >>> from subtract_square_state import SubtractSquareState
+        >>> from subtract_square_move import SubtractSquareMove
+        >>> from strategy_minimax_memoize import StrategyMinimaxMemoize
+        >>> P = Ponderer(StrategyMinimaxMemoize())
+        >>> s = SubtractSquareState('p1', current_total=20)
+        >>> P.start(s)
+        >>> P.wait()
+        >>> len(P.results)
+        4
+        >>> P.result(s.apply_move(SubtractSquareMove(9)))
+        SubtractSquareMove(9)
+        >>> P.result(SubtractSquareState('p2', current_total=3)) is None
+        True
+        '''
+        k = self.key(state)
+        with self._changed:
+            while k not in self.results and self._current == k:
+                self._changed.wait()
+            move = self.results.get(k)
+        self.stop()
+        return move
+
+    def stop(self):
+        '''(Ponderer) -> NoneType
+
+        Stop pondering, abandoning the search in progress.
+
+        >>> from tippy_game_state import TippyGameState
+        >>> from strategy_minimax import StrategyMinimax
+        >>> P = Ponderer(StrategyMinimax())
+        >>> P.start(TippyGameState('p1', dimension=4))
+        >>> P.stop()
+        >>> P.results
+        {}
+        '''
+        thread = self._thread
+        if thread is None:
+            return
+        self._stop.set()
+        thread.join()
+        self._thread = None
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
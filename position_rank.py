@@ -0,0 +1,289 @@
+from array import array
+from math import comb
+from retrograde_solver import UNKNOWN
+from subtract_square_state import SubtractSquareState
+from tippy_game_state import TippyGameState
+
+
+class TippyRanker:
+    '''
+    A numbering of the Tippy positions of one dimension by the integers
+    0 to size - 1, with no gaps.
+
+    A position is numbered from the point of view of the player about to
+    move: which cells hold the mover's pieces and which the opponent's. The
+    opponent has as many pieces as the mover, or one more, so a position of
+    k pieces has (k + 1) // 2 of the opponent's. Positions are grouped by
+    number of pieces, then numbered by the combination of occupied cells
+    and the combination of those holding the opponent's pieces.
+
+    dimension: int     -- side-length of the board
+    size: int          -- number of positions
+    offsets: list of int
+                       -- offsets[k] is the rank of the first position with
+                          k pieces
+    '''
+
+    def __init__(self, dimension):
+        '''(TippyRanker, int) -> NoneType
+
+        Initialize TippyRanker self for boards of side-length dimension.
+
+        >>> TippyRanker(3).size, TippyRanker(4).size
+        (6046, 10165779)
+        '''
+        self.dimension = dimension
+        n = dimension * dimension
+        self._binomial = [[comb(a, b) for b in range(0, n + 2)]
+                          for a in range(0, n + 1)]
+        self.offsets = [0]
+        for k in range(0, n + 1):
+            self.offsets.append(self.offsets[-1] +
+                                comb(n, k) * comb(k, (k + 1) // 2))
+        self.size = self.offsets[-1]
+
+    def rank(self, state):
+        '''(TippyRanker, TippyGameState) -> int
+
+        Return the rank of state.
+
+        Precondition: the opponent of state.next_player has as many pieces
+                      as the next player, or one more
+
+        >>> R = TippyRanker(3)
+        >>> R.rank(TippyGameState('p1'))
+        0
+        >>> b = [['o', '-', '-'], ['-', '-', '-'], ['-', '-', '-']]
+        >>> R.rank(TippyGameState('p2', board=b))
+        1
+        >>> R.rank(TippyGameState('p1', board=b))
+        Traceback (most recent call last):
+        ...
+        ValueError: not a position with p1 to move
+        '''
+        C = self._binomial
+        mover = 'o' if state.next_player == 'p1' else 'x'
+        occupied_rank = theirs_rank = k = t = 0
+        cell = 0
+        for row in state.board:
+            for tile in row:
+                if tile != '-':
+                    k += 1
+                    occupied_rank += C[cell][k]
+                    if tile != mover:
+                        t += 1
+                        theirs_rank += C[k - 1][t]
+                cell += 1
+        if t != (k + 1) // 2:
+            raise ValueError('not a position with {} to move'.format(
+                state.next_player))
+        return self.offsets[k] + occupied_rank * C[k][t] + theirs_rank
+
+    def unrank(self, rank, next_player='p1'):
+        '''(TippyRanker, int, str) -> TippyGameState
+
+        Return the position of rank rank with next_player to move.
+
+        >>> R = TippyRanker(3)
+        >>> b = [['o', 'x', '-'], ['-', 'x', '-'], ['o', '-', '-']]
+        >>> t = TippyGameState('p2', board=b)
+        >>> R.unrank(R.rank(t), 'p2') == t
+        True
+        >>> all(R.rank(R.unrank(r)) == r for r in range(0, R.size))
+        True
+        '''
+        C = self._binomial
+        k = 0
+        while self.offsets[k + 1] <= rank:
+            k += 1
+        t = (k + 1) // 2
+        occupied_rank, theirs_rank = divmod(rank - self.offsets[k], C[k][t])
+        occupied = _unrank_combination(occupied_rank, k, C)
+        theirs = set(_unrank_combination(theirs_rank, t, C))
+        mover = 'o' if next_player == 'p1' else 'x'
+        other = 'x' if mover == 'o' else 'o'
+        d = self.dimension
+        board = [['-'] * d for i in range(0, d)]
+        for (i, cell) in enumerate(occupied):
+            board[cell // d][cell % d] = other if i in theirs else mover
+        return TippyGameState(next_player, dimension=d, board=board)
+
+    def order(self):
+        '''(TippyRanker) -> iterable of int
+
+        Return the ranks so that every position comes after the positions
+        reached by its moves.
+        '''
+        return range(self.size - 1, -1, -1)
+
+
+class SubtractSquareRanker:
+    '''
+    A numbering of the Subtract Square positions up to a greatest total by
+    their totals.
+
+    size: int      -- number of positions, one more than the greatest total
+    '''
+
+    def __init__(self, max_total):
+        '''(SubtractSquareRanker, int) -> NoneType
+
+        Initialize SubtractSquareRanker self for totals 0 to max_total.
+        '''
+        self.size = max_total + 1
+
+    def rank(self, state):
+        '''(SubtractSquareRanker, SubtractSquareState) -> int
+
+        Return the rank of state.
+
+        >>> SubtractSquareRanker(20).rank(SubtractSquareState('p2',
+        ...                                                   current_total=7))
+        7
+        '''
+        return state.current_total
+
+    def unrank(self, rank, next_player='p1'):
+        '''(SubtractSquareRanker, int, str) -> SubtractSquareState
+
+        Return the position of rank rank with next_player to move.
+        '''
+        return SubtractSquareState(next_player, current_total=rank)
+
+    def order(self):
+        '''(SubtractSquareRanker) -> iterable of int
+
+        Return the ranks so that every position comes after the positions
+        reached by its moves.
+        '''
+        return range(0, self.size)
+
+
+class ValueTable:
+    '''
+    The outcomes of the positions numbered by a ranker, one byte each.
+
+    ranker: object         -- TippyRanker or SubtractSquareRanker
+    values: array of int   -- outcome code of each rank, for the player
+                              about to move; UNKNOWN if not solved
+    '''
+
+    def __init__(self, ranker, values=None):
+        '''(ValueTable, object, array) -> NoneType
+
+        Initialize ValueTable self over the ranks of ranker, with values if
+        given, or else with every position unsolved.
+        '''
+        self.ranker = ranker
+        if values is None:
+            values = array('b', [UNKNOWN]) * ranker.size
+        self.values = values
+
+    def __len__(self):
+        '''(ValueTable) -> int
+
+        Return the number of positions solved.
+        '''
+        return len(self.values) - self.values.count(UNKNOWN)
+
+    def __contains__(self, state):
+        '''(ValueTable, GameState) -> bool
+
+        Return whether state is solved.
+        '''
+        return self.values[self.ranker.rank(state)] != UNKNOWN
+
+    def __getitem__(self, state):
+        '''(ValueTable, GameState) -> float
+
+        Return the outcome of state for its next player.
+        '''
+        value = self.values[self.ranker.rank(state)]
+        if value == UNKNOWN:
+            raise KeyError(state)
+        return float(value)
+
+    def __setitem__(self, state, value):
+        '''(ValueTable, GameState, float) -> NoneType
+
+        Record value, in {WIN, LOSE, DRAW}, as the outcome of state.
+        '''
+        self.values[self.ranker.rank(state)] = int(value)
+
+    def save(self, path):
+        '''(ValueTable, str) -> NoneType
+
+        Write the values of self to file path.
+        '''
+        with open(path, 'wb') as f:
+            self.values.tofile(f)
+
+    @staticmethod
+    def load(ranker, path):
+        '''(object, str) -> ValueTable
+
+        Return the ValueTable over the ranks of ranker saved in file path.
+
+        >>> import os, tempfile
+        >>> path = os.path.join(tempfile.mkdtemp(), 'values')
+        >>> V = solve_table(SubtractSquareRanker(30))
+        >>> V.save(path)
+        >>> ValueTable.load(SubtractSquareRanker(30), path).values == V.values
+        True
+        '''
+        values = array('b')
+        with open(path, 'rb') as f:
+            values.fromfile(f, ranker.size)
+        return ValueTable(ranker, values)
+
+
+def solve_table(ranker):
+    '''(object) -> ValueTable
+
+    Return the outcome of every position numbered by ranker, found by
+    working back from the positions reached last.
+
+    >>> V = solve_table(TippyRanker(3))
+    >>> len(V), V[TippyGameState('p1')]
+    (6046, 1.0)
+    >>> V = solve_table(SubtractSquareRanker(20))
+    >>> [V[SubtractSquareState('p1', current_total=n)] for n in range(0, 8)]
+    [-1.0, 1.0, -1.0, 1.0, 1.0, -1.0, 1.0, -1.0]
+    '''
+    table = ValueTable(ranker)
+    values, rank = table.values, ranker.rank
+    for r in ranker.order():
+        state = ranker.unrank(r)
+        if state.over:
+            values[r] = int(state.outcome())
+        else:
+            values[r] = max(-values[rank(state.apply_move(move))]
+                            for move in state.possible_next_moves())
+    return table
+
+
+def _unrank_combination(rank, k, C):
+    '''(int, int, list of list of int) -> list of int
+
+    Return the k numbers, in increasing order, of the combination of colex
+    rank rank, given binomial coefficients C.
+
+    >>> C = [[comb(a, b) for b in range(0, 6)] for a in range(0, 6)]
+    >>> _unrank_combination(C[4][3] + C[1][2] + C[0][1], 3, C)
+    [0, 1, 4]
+    '''
+    cells = []
+    c = len(C) - 1
+    for i in range(k, 0, -1):
+        while C[c][i] > rank:
+            c -= 1
+        cells.append(c)
+        rank -= C[c][i]
+        c -= 1
+    cells.reverse()
+    return cells
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
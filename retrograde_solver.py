@@ -0,0 +1,248 @@
+from array import array
+from collections import deque
+from game_state import state_key
+
+# codes of the outcomes held in a value array; UNKNOWN marks a state whose
+# value has not been propagated yet
+WIN, LOSE, DRAW, UNKNOWN = 1, -1, 0, -128
+
+
+class RetrogradeSolution:
+    '''
+    The value of every state reachable from a root GameState.
+
+    States are numbered in the breadth-first order they were discovered,
+    the root being 0.
+
+    index: dict of {object: int}   -- state key to state number
+    values: array of int           -- outcome code of each state, for the
+                                      player about to move in that state
+    key: function                  -- maps a GameState to its key
+    '''
+
+    def __init__(self, index, values, key):
+        '''(RetrogradeSolution, dict, array, function) -> NoneType
+
+        Initialize RetrogradeSolution self from a state index and the
+        matching array of outcome codes.
+        '''
+        self.index, self.values, self.key = index, values, key
+
+    def __len__(self):
+        '''(RetrogradeSolution) -> int
+
+        Return the number of states solved.
+
+        >>> from subtract_square_state import SubtractSquareState
+        >>> len(solve(SubtractSquareState('p1', current_total=4)))
+        5
+        '''
+        return len(self.values)
+
+    def __contains__(self, state):
+        '''(RetrogradeSolution, GameState) -> bool
+
+        Return whether state is among the states solved.
+
+        >>> from subtract_square_state import SubtractSquareState
+        >>> sol = solve(SubtractSquareState('p1', current_total=4))
+        >>> SubtractSquareState('p2', current_total=3) in sol
+        True
+        >>> SubtractSquareState('p2', current_total=2) in sol
+        True
+        >>> SubtractSquareState('p2', current_total=5) in sol
+        False
+        '''
+        return self.key(state) in self.index
+
+    def value(self, state):
+        '''(RetrogradeSolution, GameState) -> float
+
+        Return the outcome in {WIN, LOSE, DRAW} of state for its next player,
+        assuming best play from both players.
+
+        Precondition: state in self
+
+        >>> from tippy_game_state import TippyGameState
+        >>> b = [['o', 'o', 'o'], ['-', '-', '-'], ['x', 'x', 'x']]
+        >>> t = TippyGameState('p2', board=b)
+        >>> solve(t).value(t)
+        1.0
+        '''
+        return float(self.values[self.index[self.key(state)]])
+
+    def best_move(self, state):
+        '''(RetrogradeSolution, GameState) -> Move
+
+        Return the first move from state that keeps its value.
+
+        Precondition: state in self and not state.over
+
+        >>> from subtract_square_state import SubtractSquareState
+        >>> s = SubtractSquareState('p1', current_total=20)
+        >>> solve(s).best_move(s)
+        SubtractSquareMove(16)
+        '''
+        target = -self.values[self.index[self.key(state)]]
+        for move in state.possible_next_moves():
+            child = state.apply_move(move)
+            if self.values[self.index[self.key(child)]] == target:
+                return move
+
+    def fill(self, table):
+        '''(RetrogradeSolution, ValueTable) -> NoneType
+
+        Copy the outcome of every state solved into table, a ValueTable.
+
+        Precondition: self.key is table.ranker.rank
+
+        >>> from position_rank import TippyRanker, ValueTable
+        >>> from tippy_game_state import TippyGameState
+        >>> R = TippyRanker(3)
+        >>> t = TippyGameState('p1')
+        >>> V = ValueTable(R)
+        >>> solve(t, key=R.rank).fill(V)
+        >>> len(V), V[t]
+        (5998, 1.0)
+        '''
+        values = table.values
+        for (rank, i) in self.index.items():
+            values[rank] = self.values[i]
+
+
+def solve(state, key=state_key, processes=0):
+    '''(GameState, function, int) -> RetrogradeSolution
+
+    Return the value of every state reachable from state, for a game whose
+    state graph is finite and acyclic.
+
+    The graph is enumerated one breadth-first level at a time, spreading each
+    level over processes worker processes if processes > 0, and stored as
+    arrays of child numbers. Outcomes are then propagated from the finished
+    states back to the root without recursion: a state is a WIN as soon as
+    one child is a LOSE, and otherwise is decided once all of its children
+    are. key must map states to the same hashable value only if they have
+    the same outcome for their next players, as GameState.key does; with
+    processes > 0 it must be picklable.
+
+    Every key is held in a dict, and a whole level of states in a list, so
+    solve only suits games whose reachable states fit in memory as Python
+    objects. Where a ranker from position_rank numbers the positions,
+    position_rank.solve_table stores one byte per position instead.
+
+    >>> from subtract_square_state import SubtractSquareState
+    >>> sol = solve(SubtractSquareState('p1', current_total=20))
+    >>> [sol.value(SubtractSquareState('p2', current_total=n))
+    ...  for n in range(0, 8)]
+    [-1.0, 1.0, -1.0, 1.0, 1.0, -1.0, 1.0, -1.0]
+    >>> from tippy_game_state import TippyGameState
+    >>> t = TippyGameState('p1')
+    >>> sol = solve(t)
+    >>> len(sol), sol.value(t)
+    (5998, 1.0)
+    >>> solve(t, processes=2).values == sol.values
+    True
+    '''
+    index = {key(state): 0}
+    values = array('b')
+    children, offsets = array('l'), array('l', [0])
+    frontier = [state]
+    if processes > 0:
+        from multiprocessing import Pool
+        pool = Pool(processes)
+    try:
+        while frontier:
+            if processes > 0:
+                chunk = max(1, len(frontier) // (4 * processes))
+                expanded = pool.imap(_Expander(key), frontier, chunk)
+            else:
+                expanded = map(_Expander(key), frontier)
+            next_frontier = []
+            # states are expanded in the order they were numbered, so each
+            # one's outcome and children are appended at its own number
+            for outcome, successors in expanded:
+                values.append(outcome)
+                for child_key, child in successors:
+                    number = index.get(child_key)
+                    if number is None:
+                        number = index[child_key] = len(index)
+                        next_frontier.append(child)
+                    children.append(number)
+                offsets.append(len(children))
+            frontier = next_frontier
+    finally:
+        if processes > 0:
+            pool.close()
+            pool.join()
+    _propagate(values, children, offsets)
+    return RetrogradeSolution(index, values, key)
+
+
+class _Expander:
+    '''
+    Picklable function from a state to its outcome code, or UNKNOWN, and
+    the keys and states of its children.
+
+    key: function   -- maps a GameState to its key
+    '''
+
+    def __init__(self, key):
+        '''(_Expander, function) -> NoneType
+        '''
+        self.key = key
+
+    def __call__(self, state):
+        '''(_Expander, GameState) -> (int, list of (object, GameState))
+        '''
+        if state.over:
+            return int(state.outcome()), []
+        return UNKNOWN, [(self.key(child), child) for child in
+                         (state.apply_move(move)
+                          for move in state.possible_next_moves())]
+
+
+def _propagate(values, children, offsets):
+    '''(array, array, array) -> NoneType
+
+    Replace each UNKNOWN in values by the outcome under best play, where the
+    children of state i are children[offsets[i]:offsets[i + 1]].
+    '''
+    n = len(values)
+    # invert the child arrays into parent arrays of the same layout
+    parent_offsets = array('l', [0]) * (n + 1)
+    for c in children:
+        parent_offsets[c + 1] += 1
+    for i in range(0, n):
+        parent_offsets[i + 1] += parent_offsets[i]
+    parents = array('l', [0]) * len(children)
+    cursor = parent_offsets[:]
+    for p in range(0, n):
+        for i in range(offsets[p], offsets[p + 1]):
+            c = children[i]
+            parents[cursor[c]] = p
+            cursor[c] += 1
+    remaining = array('l', (offsets[i + 1] - offsets[i] for i in range(0, n)))
+    has_draw = bytearray(n)
+    solved = deque(i for i in range(0, n) if values[i] != UNKNOWN)
+    while solved:
+        c = solved.popleft()
+        v = values[c]
+        for i in range(parent_offsets[c], parent_offsets[c + 1]):
+            p = parents[i]
+            if values[p] != UNKNOWN:
+                continue
+            if v == LOSE:
+                values[p] = WIN
+                solved.append(p)
+            else:
+                if v == DRAW:
+                    has_draw[p] = 1
+                remaining[p] -= 1
+                if remaining[p] == 0:
+                    values[p] = DRAW if has_draw[p] else LOSE
+                    solved.append(p)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,407 @@
+'''
+Game tree searches run with an explicit stack of frames instead of
+recursion, so that the depth of a search is limited only by memory, never
+by the interpreter's recursion limit, and no Python call is made per state
+searched beyond those of the GameState itself.
+
+Negamax scores states for the player about to move; AlphaBeta scores them
+absolutely, as StrategyMinimaxPrune does, the higher the better for p1.
+
+Both shrink a score by DECAY for each move it lies below the state scored,
+so that of two wins the faster scores higher, and of two losses the
+slower. A state is then worth at most WIN only when it is over, so no
+search goes on among the moves of a state once one of them wins at once.
+
+A search run in a thread given a stop event (refer to stop_searches) is
+abandoned between two states once the event is set, with Cancelled.
+'''
+import threading
+from game_state import GameState, state_key
+from transposition_table import EXACT, LOWER, UPPER
+
+# the factor a score shrinks by for each move between a state and the end
+# of the game that gives the score
+DECAY = 0.999
+
+# the stop event of the searches run in each thread
+_stops = threading.local()
+
+
+class Cancelled(Exception):
+    '''
+    Raised out of a search whose thread's stop event was set.
+    '''
+
+
+def stop_searches(event):
+    '''(threading.Event) -> NoneType
+
+    Make every search run in this thread from now on raise Cancelled once
+    event is set, or never if event is None. A search is only stopped
+    between two states, with its stack and memo whole, and it can be
+    carried on by calling its run method again.
+
+    >>> from subtract_square_state import SubtractSquareState
+    >>> stop = threading.Event()
+    >>> stop_searches(stop)
+    >>> N = Negamax(SubtractSquareState('p1', current_total=200), memo={})
+    >>> stop.set()
+    >>> N.run()
+    Traceback (most recent call last):
+    ...
+    search_core.Cancelled
+    >>> stop_searches(None)
+    >>> N.run(), N.nodes
+    (0.9851045463620021, 1709)
+    '''
+    _stops.event = event
+
+
+class Negamax:
+    '''
+    A minimax search of the states below a root, each scored for the player
+    about to move in it, optionally limited in depth and remembering the
+    scores it finds.
+
+    A depth-limited search goes on past its depth through forcing moves
+    only (refer to GameState.forcing_moves), so that no state is scored
+    by its rough_outcome, or by evaluate if it is given, while a tippy or
+    a square total is pending.
+
+    Scores are remembered in memo under key(state), or under
+    (key(state), depth) in a depth-limited search, so a score is only
+    reused at the same depth.
+
+    depth: int         -- moves to look ahead from the root, or None to
+                          search to the end of the game
+    memo: object       -- remembered scores; any object supporting get
+                          and []=, or None
+    key: function      -- maps a GameState to its key in memo
+    evaluate: function -- scores the states at the depth limit for the
+                          player about to move, or None to use their
+                          rough_outcome
+    stack: list of list
+                       -- a frame for each state being searched, innermost
+                          last: the state, its remaining depth, its key in
+                          memo, its moves, the index of its next move and
+                          its best score so far
+    nodes: int         -- states entered so far
+    value: float       -- score of the root, once the search is finished
+    '''
+
+    def __init__(self, state, depth=None, memo=None, key=state_key,
+                 evaluate=None):
+        '''(Negamax, GameState, int, object, function, function) -> NoneType
+
+        Initialize Negamax self to search state.
+        '''
+        self.depth, self.memo, self.key = depth, memo, key
+        self.evaluate = evaluate
+        self.stack, self.nodes, self.value = [], 0, None
+        if depth is not None and hasattr(state, 'threat_counter'):
+            # the leaves of a depth-limited search count threats, and
+            # building the counter once at the root lets apply_move pass
+            # updated copies of it down the tree
+            state.threat_counter()
+        self._result = self._enter(state, depth)
+
+    def _enter(self, state, depth):
+        '''(Negamax, GameState, int) -> float or NoneType
+
+        Return the score of state if it is found without searching below
+        state, or else push a frame for state and return None.
+        '''
+        self.nodes += 1
+        if state.over:
+            return state.outcome()
+        elif depth == 0:
+            # at the horizon only forcing moves are searched, until the
+            # state is quiet enough for its rough_outcome to be trusted
+            moves = state.forcing_moves()
+            if not moves:
+                return (state.rough_outcome() if self.evaluate is None
+                        else self.evaluate(state))
+        k = None
+        if self.memo is not None:
+            k = self.key(state) if depth is None else (self.key(state), depth)
+            score = self.memo.get(k)
+            if score is not None:
+                return score
+        if depth != 0:
+            moves = state.possible_next_moves()
+        self.stack.append([state, depth, k, moves, 0, None])
+        return None
+
+    def run(self, max_nodes=None):
+        '''(Negamax, int) -> float or NoneType
+
+        Search until the score of the root is found, and return it. If
+        max_nodes is given, stop instead once max_nodes more states have
+        been entered and return None; the next call carries on from there.
+
+        >>> from subtract_square_state import SubtractSquareState
+        >>> N = Negamax(SubtractSquareState('p1', current_total=1500),
+        ...             memo={})
+        >>> N.run(), N.nodes
+        (0.9851045463620021, 37317)
+        >>> from tippy_game_state import TippyGameState
+        >>> b = [['o', 'o', 'o'], ['-', '-', '-'], ['x', 'x', 'x']]
+        >>> N = Negamax(TippyGameState('p2', board=b), depth=1)
+        >>> N.run(), N.nodes
+        (0.997002999, 12)
+        >>> N = Negamax(SubtractSquareState('p1', current_total=1500),
+        ...             memo={})
+        >>> N.run(20000), N.nodes, len(N.stack)
+        (None, 20001, 5)
+        >>> N.run(), N.nodes
+        (0.9851045463620021, 37317)
+        '''
+        stack, memo = self.stack, self.memo
+        result = self._result
+        if not stack and result is None:
+            return self.value
+        limit = None if max_nodes is None else self.nodes + max_nodes
+        stop = getattr(_stops, 'event', None)
+        while stack:
+            if limit is not None and self.nodes >= limit:
+                self._result = result
+                return None
+            elif stop is not None and stop.is_set():
+                self._result = result
+                raise Cancelled()
+            frame = stack[-1]
+            if result is not None:
+                # a child of frame's state has been scored
+                score = -result
+                if frame[5] is None or score > frame[5]:
+                    frame[5] = score
+                result = None
+            moves, i = frame[3], frame[4]
+            # no score beats a move that wins at once, so once one is
+            # found the other moves are left unsearched
+            if i < len(moves) and (frame[5] is None or
+                                   frame[5] < GameState.WIN):
+                frame[4] = i + 1
+                depth = frame[1]
+                result = self._enter(frame[0].apply_move(moves[i]),
+                                     depth - 1 if depth else depth)
+            else:
+                stack.pop()
+                result = frame[5] * DECAY
+                if frame[2] is not None:
+                    memo[frame[2]] = result
+        self._result, self.value = None, result
+        return result
+
+
+class AlphaBeta:
+    '''
+    An alpha-beta search of the states below a root, scoring states
+    absolutely: the higher the score, the better for p1, and the lower,
+    the better for p2.
+
+    A state is searched within a window (p1, p2): p1 is the best score p1
+    is already sure of elsewhere, p2 that for p2, and a search stops as
+    soon as its state is shown to lie outside the window. Scores, or the
+    bounds a cut-off search leaves, are stored in a TranspositionTable for
+    the player about to move, as state keys leave out which player that is
+    (refer to GameState.key), and the index of the best move from each
+    state is recorded as a hint, to be searched first when the state is
+    met again.
+
+    table: TranspositionTable   -- scores of states searched, or None
+    hints: dict of {object: int}
+                                -- key of a state to the index of its best
+                                   move, or None
+    record: function            -- records a hint, given the key and index,
+                                   or None
+    key: function               -- maps a GameState to its key
+    stack: list of list         -- a frame for each state being searched,
+                                   innermost last: the state, its key, its
+                                   moves, the order to search them in, the
+                                   position of its next move in the order,
+                                   its best score and the index of its
+                                   move, its window, and whether p1 moves
+    nodes: int                  -- states entered so far
+    value: float                -- score of the root, once finished
+    '''
+
+    def __init__(self, state, p1=-1.0, p2=1.0, table=None, hints=None,
+                 record=None, key=state_key):
+        '''(AlphaBeta, GameState, float, float, TranspositionTable, dict,
+            function, function) -> NoneType
+
+        Initialize AlphaBeta self to search state within window (p1, p2).
+        '''
+        self.table, self.hints, self.record = table, hints, record
+        self.key = key
+        self.stack, self.nodes, self.value = [], 0, None
+        self._result = self._enter(state, p1, p2)
+
+    def _enter(self, state, p1, p2):
+        '''(AlphaBeta, GameState, float, float) -> float or NoneType
+
+        Return the score of state if it is found without searching below
+        state, or else push a frame for state and return None.
+        '''
+        self.nodes += 1
+        if state.over:
+            return (state.outcome() if state.next_player == 'p1'
+                    else -state.outcome())
+        k = self.key(state)
+        maximizing = state.next_player == 'p1'
+        if self.table is not None:
+            entry = self.table.probe(k)
+            if entry is not None:
+                (score, kind) = _absolute(entry[0], entry[1], maximizing)
+                if kind == EXACT:
+                    return score
+                elif kind == LOWER:
+                    p1 = max(p1, score)
+                else:
+                    p2 = min(p2, score)
+                if p1 >= p2:
+                    return score
+        # a state that is not over scores at most DECAY in size, so a window
+        # beyond that is settled at once
+        if p1 >= DECAY:
+            return DECAY
+        elif p2 <= -DECAY:
+            return -DECAY
+        # the window is on the score of state, and its moves' best score is
+        # that divided by DECAY
+        p1 = max(p1 / DECAY, GameState.LOSE)
+        p2 = min(p2 / DECAY, GameState.WIN)
+        moves = state.possible_next_moves()
+        order = list(range(0, len(moves)))
+        hint = None if self.hints is None else self.hints.get(k)
+        if hint is not None and hint < len(moves):
+            # the best move last time is the likeliest to cut off early
+            order.remove(hint)
+            order.insert(0, hint)
+        # when no move beats the window, the first one searched stands in
+        self.stack.append([state, k, moves, order, 0,
+                           p1 if maximizing else p2, order[0], p1, p2,
+                           maximizing])
+        return None
+
+    def run(self, max_nodes=None):
+        '''(AlphaBeta, int) -> float or NoneType
+
+        Search until the score of the root is found, and return it. If
+        max_nodes is given, stop instead once max_nodes more states have
+        been entered and return None; the next call carries on from there.
+
+        >>> from tippy_game_state import TippyGameState
+        >>> b = [['o', 'o', 'o'], ['-', '-', '-'], ['x', 'x', 'x']]
+        >>> AlphaBeta(TippyGameState('p2', board=b)).run()
+        -0.997002999
+        >>> from subtract_square_state import SubtractSquareState
+        >>> from transposition_table import TranspositionTable
+        >>> A = AlphaBeta(SubtractSquareState('p1', current_total=1500),
+        ...               table=TranspositionTable())
+        >>> A.run(), A.nodes
+        (0.9851045463620021, 1764)
+        '''
+        stack, table = self.stack, self.table
+        result = self._result
+        if not stack and result is None:
+            return self.value
+        limit = None if max_nodes is None else self.nodes + max_nodes
+        stop = getattr(_stops, 'event', None)
+        while stack:
+            if limit is not None and self.nodes >= limit:
+                self._result = result
+                return None
+            elif stop is not None and stop.is_set():
+                self._result = result
+                raise Cancelled()
+            frame = stack[-1]
+            if result is not None:
+                # a child of frame's state has been scored
+                if (result > frame[5] if frame[9] else result < frame[5]):
+                    frame[5], frame[6] = result, frame[3][frame[4] - 1]
+                result = None
+            best, p1, p2 = frame[5], frame[7], frame[8]
+            cut = best >= p2 if frame[9] else best <= p1
+            if not cut and frame[4] < len(frame[3]):
+                i = frame[3][frame[4]]
+                frame[4] += 1
+                # the best score found so far narrows the window below
+                if frame[9]:
+                    p1 = max(p1, best)
+                else:
+                    p2 = min(p2, best)
+                result = self._enter(frame[0].apply_move(frame[2][i]), p1, p2)
+            else:
+                stack.pop()
+                if self.record is not None:
+                    self.record(frame[1], frame[6])
+                result = best * DECAY
+                if table is not None:
+                    # a score at the edge of the window only bounds the
+                    # true score, unless no score lies beyond it
+                    if best >= GameState.WIN or best <= GameState.LOSE:
+                        kind = EXACT
+                    elif best <= p1:
+                        kind = UPPER
+                    elif best >= p2:
+                        kind = LOWER
+                    else:
+                        kind = EXACT
+                    table.store(frame[1],
+                                *_absolute(result, kind, frame[9]))
+        self._result, self.value = None, result
+        return result
+
+
+def _absolute(score, kind, maximizing):
+    '''(float, int, bool) -> (float, int)
+
+    Return score, of the given kind, turned from the point of view of the
+    player about to move to that of p1, or back, given whether p1 is the
+    player about to move.
+
+    >>> _absolute(1.0, LOWER, False) == (-1.0, UPPER)
+    True
+    '''
+    if maximizing:
+        return score, kind
+    return -score, {EXACT: EXACT, LOWER: UPPER, UPPER: LOWER}[kind]
+
+
+def negamax(state, depth=None, memo=None, key=state_key, evaluate=None):
+    '''(GameState, int, object, function, function) -> (float, int)
+
+    Return the score of state for its next player found by a Negamax
+    search, and the number of states the search entered.
+
+    >>> from tippy_game_state import TippyGameState
+    >>> b = [['o', 'o', 'o'], ['-', 'o', '-'], ['x', 'x', 'x']]
+    >>> negamax(TippyGameState('p2', board=b))
+    (-0.998001, 5)
+    '''
+    search = Negamax(state, depth, memo, key, evaluate)
+    return search.run(), search.nodes
+
+
+def alphabeta(state, p1=-1.0, p2=1.0, table=None, hints=None, record=None,
+              key=state_key):
+    '''(GameState, float, float, TranspositionTable, dict, function,
+        function) -> (float, int)
+
+    Return the absolute score of state found by an AlphaBeta search within
+    window (p1, p2), and the number of states the search entered.
+
+    >>> from tippy_game_state import TippyGameState
+    >>> b = [['o', 'o', 'o'], ['-', 'o', '-'], ['x', 'x', 'x']]
+    >>> alphabeta(TippyGameState('p2', board=b))
+    (0.998001, 5)
+    '''
+    search = AlphaBeta(state, p1, p2, table, hints, record, key)
+    return search.run(), search.nodes
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,353 @@
+from array import array
+from game_state import GameState
+from tippy_game_state import TippyGameState
+from tippy_move import TippyMove
+from tippy_threats import ThreatCounter, tippy_windows
+
+
+def _weight(counts):
+    '''((int, int)) -> int
+
+    Return the weight ThreatCounter.score gives a window holding counts[0]
+    of p1's pieces and counts[1] of p2's: positive while it is live for p1
+    only, negative while it is live for p2 only, and 0 otherwise.
+    '''
+    (o, x) = counts
+    if x == 0 and o < 4:
+        return ThreatCounter.WEIGHTS[o]
+    elif o == 0 and x < 4:
+        return -ThreatCounter.WEIGHTS[x]
+    return 0
+
+
+class SparseTippyGameState(TippyGameState):
+    ''' The state of a Tippy game on a board too large to store or search
+    cell by cell.
+
+    Only the occupied tiles are stored, and the moves offered are only the
+    candidates: the empty tiles sharing a tippy window with some piece,
+    kept up to date move by move. A tile out of reach of every piece
+    neither helps nor hinders any tippy yet, so strategies branch on the
+    tiles where the game is being played rather than on the whole board.
+    Any empty tile is still a legal move (refer to is_legal).
+
+    Tiles are numbered row * dimension + column, as in tippy_windows.
+
+    dimension: int              -- dimensions of a square board
+    cells: dict of {int: str}   -- the letter on each occupied tile
+    candidates: set of int      -- empty tiles within tippy reach of a
+                                   piece, or the centre tile of an empty
+                                   board
+
+    Inherits method outcome from parent class GameState.
+    '''
+    __slots__ = ('cells', 'candidates', '_counts', '_balance', '_open',
+                 '_winner')
+
+    def __init__(self, p, interactive=False, dimension=3, board=None):
+        '''(SparseTippyGameState, str, bool, int, list of lists) -> NoneType
+
+        Initialize SparseTippyGameState self with a board of side-length
+        dimension, holding the pieces of board if it is given.
+
+        Overrides __init__ method from parent class TippyGameState.
+
+        Assume:  3 <= dimension is an int
+                        p in {'p1', 'p2'}
+        '''
+        self.dimension = dimension
+        if interactive:
+            self.dimension = int(input('What dimension grid?'))
+        GameState.__init__(self, p)
+        d = self.dimension
+        self.cells, self.candidates = {}, set()
+        # pieces of p1 and p2 in each window holding any, the total weight
+        # of the windows (refer to _weight), and the windows each letter
+        # forms a tippy in by filling their last tile
+        self._counts, self._balance = {}, 0
+        self._open = {'o': set(), 'x': set()}
+        self._winner = None
+        if board is not None:
+            for r in range(0, d):
+                for c in range(0, d):
+                    if board[r][c] != '-':
+                        self._place(r * d + c, board[r][c])
+        if not self.cells:
+            self.candidates.add((d // 2) * d + d // 2)
+        self.over = self._winner is not None or not self.candidates
+        self._threats = self._patterns = self._key = None
+
+    def _place(self, cell, letter):
+        '''(SparseTippyGameState, int, str) -> NoneType
+
+        Record a piece of letter on the empty tile cell, updating only the
+        windows that contain it.
+        '''
+        windows, cell_windows = tippy_windows(self.dimension)
+        self.cells[cell] = letter
+        self.candidates.discard(cell)
+        for w in cell_windows[cell]:
+            (o, x) = old = self._counts.get(w, (0, 0))
+            new = (o + 1, x) if letter == 'o' else (o, x + 1)
+            self._counts[w] = new
+            self._balance += _weight(new) - _weight(old)
+            for (side, own, opp) in (('o', new[0], new[1]),
+                                     ('x', new[1], new[0])):
+                if own == 3 and opp == 0:
+                    self._open[side].add(w)
+                else:
+                    self._open[side].discard(w)
+            if 4 in new:
+                self._winner = letter
+            for other in windows[w]:
+                if other not in self.cells:
+                    self.candidates.add(other)
+
+    def __repr__(self):
+        '''(SparseTippyGameState) -> str
+
+        Return a string representation of SparseTippyGameState self
+        that evaluates to an equivalent SparseTippyGameState.
+
+        >>> SparseTippyGameState('p1', dimension=40)
+        SparseTippyGameState('p1', False, 40)
+        '''
+        return 'SparseTippyGameState({}, False, {})'.format(
+            repr(self.next_player), repr(self.dimension))
+
+    def __eq__(self, other):
+        '''(SparseTippyGameState, object) -> bool
+
+        Return True iff this SparseTippyGameState is the equivalent to
+        other, which may also be a TippyGameState with the same board.
+
+        >>> b = [['o', '-', '-'], ['-', 'x', '-'], ['-', '-', '-']]
+        >>> s = SparseTippyGameState('p1', board=b)
+        >>> s == SparseTippyGameState('p1', board=b)
+        True
+        >>> s == TippyGameState('p1', board=b)
+        True
+        '''
+        if isinstance(other, SparseTippyGameState):
+            return (self.dimension == other.dimension and
+                    self.cells == other.cells and
+                    self.next_player == other.next_player)
+        return TippyGameState.__eq__(self, other)
+
+    @property
+    def board(self):
+        '''(SparseTippyGameState) -> tuple of tuple of str
+
+        Return the full board of self, built afresh from its occupied tiles.
+
+        >>> s = SparseTippyGameState('p1').apply_move(TippyMove((1, 1)))
+        >>> s.board
+        (('-', '-', '-'), ('-', 'o', '-'), ('-', '-', '-'))
+        '''
+        d = self.dimension
+        board = [['-'] * d for r in range(0, d)]
+        for cell, letter in self.cells.items():
+            board[cell // d][cell % d] = letter
+        return tuple(tuple(row) for row in board)
+
+    def key(self):
+        '''(SparseTippyGameState) -> bytes
+
+        Return the side-length of the board of self followed by its occupied
+        tiles in increasing order, as 4-byte words: 2 * tile for a piece of
+        next_player, and 2 * tile + 1 for one of the opponent's.
+
+        Overrides key method in parent class.
+
+        >>> b = [['o', '-', '-'], ['-', 'x', '-'], ['-', '-', '-']]
+        >>> k = SparseTippyGameState('p1', board=b).key()
+        >>> list(array('I', k))
+        [3, 0, 9]
+        >>> k == SparseTippyGameState('p2', board=[['x', '-', '-'],
+        ...                                        ['-', 'o', '-'],
+        ...                                        ['-', '-', '-']]).key()
+        True
+        '''
+        mover = 'o' if self.next_player == 'p1' else 'x'
+        return array('I', [self.dimension] + [
+            2 * cell + (letter != mover)
+            for (cell, letter) in sorted(self.cells.items())]).tobytes()
+
+    def apply_move(self, move):
+        '''(SparseTippyGameState, TippyMove) -> SparseTippyGameState
+
+        Return the new SparseTippyGameState reached by applying move to
+        self, updating the candidates and checking for a tippy only around
+        the tile of move.
+
+        Overrides apply_move method in parent class.
+
+        >>> s = SparseTippyGameState('p1', dimension=25)
+        >>> s.possible_next_moves()
+        [TippyMove((12, 12))]
+        >>> s = s.apply_move(TippyMove((12, 12)))
+        >>> len(s.possible_next_moves())
+        16
+        >>> for coord in [(0, 0), (12, 13), (0, 1), (13, 13), (1, 1)]:
+        ...     s = s.apply_move(TippyMove(coord))
+        >>> len(s.possible_next_moves()), s.over
+        (36, False)
+        >>> s = s.apply_move(TippyMove((13, 14)))
+        >>> s.over, s.winner('p1')
+        (True, True)
+        '''
+        letter = 'o' if self.next_player == 'p1' else 'x'
+        (r, c) = move.coord
+        new_state = SparseTippyGameState.__new__(SparseTippyGameState)
+        GameState.__init__(new_state, self.opponent())
+        new_state.dimension = self.dimension
+        new_state.cells = dict(self.cells)
+        new_state.candidates = set(self.candidates)
+        new_state._counts, new_state._balance = dict(self._counts), \
+            self._balance
+        new_state._open = {'o': set(self._open['o']),
+                           'x': set(self._open['x'])}
+        new_state._winner = None
+        new_state._place(r * self.dimension + c, letter)
+        new_state.over = (new_state._winner is not None or
+                          not new_state.candidates)
+        new_state._threats = new_state._key = None
+        if self._threats is not None:
+            # only carried over once built, as building it visits every tile
+            new_state._threats = self._threats.copy()
+            new_state._threats.place(r, c, letter)
+        new_state._patterns = None
+        if self._patterns is not None:
+            new_state._patterns = self._patterns.copy()
+            new_state._patterns.place(r, c, letter)
+        return new_state
+
+    def winner(self, player):
+        '''(SparseTippyGameState, str) -> bool
+
+        Return True iff the SparseTippyGameState self is over and player
+        has won.
+
+        Preconditions: player is either 'p1' or 'p2'
+
+        Overrides winner method in parent class.
+
+        >>> b = [['o', 'o', 'o'], ['x', 'o', 'o'], ['x', 'x', 'x']]
+        >>> s = SparseTippyGameState('p1', board=b)
+        >>> s.winner('p1'), s.winner('p2')
+        (True, False)
+        '''
+        return self._winner == ('o' if player == 'p1' else 'x')
+
+    def possible_next_moves(self):
+        '''(SparseTippyGameState) -> list of TippyMove
+
+        Return the candidate moves from the present state self, row by row.
+
+        Overrides possible_next_moves method in parent class.
+
+        >>> b = [['o', '-', '-', '-'], ['-', '-', '-', '-'],
+        ...      ['-', '-', '-', '-'], ['-', '-', '-', '-']]
+        >>> SparseTippyGameState('p2', dimension=4,
+        ...                      board=b).possible_next_moves()
+        [TippyMove((0, 1)), TippyMove((1, 0)), TippyMove((1, 1)), \
+TippyMove((1, 2)), TippyMove((2, 1))]
+        '''
+        return [TippyMove(divmod(cell, self.dimension))
+                for cell in sorted(self.candidates)]
+
+    def is_legal(self, move):
+        '''(SparseTippyGameState, TippyMove) -> bool
+
+        Return whether move occupies an empty tile of the board of self,
+        candidate or not.
+
+        Overrides is_legal method in parent class.
+
+        >>> s = SparseTippyGameState('p1', dimension=25)
+        >>> s.is_legal(TippyMove((3, 20))), s.is_legal(TippyMove((3, 25)))
+        (True, False)
+        '''
+        (r, c) = move.coord
+        d = self.dimension
+        return (not self.over and 0 <= r < d and 0 <= c < d and
+                r * d + c not in self.cells)
+
+    def rough_outcome(self):
+        '''(SparseTippyGameState) -> float
+
+        Return an estimate in interval [LOSE, WIN] of best outcome
+        next_player can guarantee from state self.
+
+        Overrides rough_outcome method in parent class. The estimate is the
+        one ThreatCounter.score makes, from the windows holding some piece,
+        kept up to date move by move.
+
+        >>> b = [['-', '-', '-', '-'], ['-', 'o', 'o', '-'],
+        ...      ['-', '-', 'x', '-'], ['-', '-', '-', '-']]
+        >>> s = SparseTippyGameState('p2', dimension=4, board=b)
+        >>> t = TippyGameState('p2', dimension=4, board=b)
+        >>> s.rough_outcome() == t.rough_outcome()
+        True
+        '''
+        letter = 'o' if self.next_player == 'p1' else 'x'
+        other = 'x' if letter == 'o' else 'o'
+        if self._winner is not None:
+            return GameState.WIN if self._winner == letter else GameState.LOSE
+        elif self._open[letter]:
+            return GameState.WIN
+        windows = tippy_windows(self.dimension)[0]
+        completions = set(cell for w in self._open[other]
+                          for cell in windows[w] if cell not in self.cells)
+        if len(completions) >= 2:
+            return GameState.LOSE
+        balance = self._balance if letter == 'o' else -self._balance
+        return balance / (abs(balance) + ThreatCounter.SCALE)
+
+    def forcing_moves(self):
+        '''(SparseTippyGameState) -> list of TippyMove
+
+        Return the moves on which next_player forms a tippy, or if there
+        are none, those on which the opponent would; either way, row by row.
+
+        Overrides forcing_moves method in parent class.
+
+        >>> s = SparseTippyGameState('p2', dimension=30)
+        >>> for coord in [(9, 9), (20, 20), (9, 10), (21, 21), (10, 10)]:
+        ...     s = s.apply_move(TippyMove(coord))
+        >>> s.forcing_moves()
+        [TippyMove((8, 9)), TippyMove((10, 11))]
+        '''
+        if self.over:
+            return []
+        letter = 'o' if self.next_player == 'p1' else 'x'
+        other = 'x' if letter == 'o' else 'o'
+        windows = tippy_windows(self.dimension)[0]
+        cells = set()
+        for side in (letter, other):
+            cells = set(cell for w in self._open[side]
+                        for cell in windows[w] if cell not in self.cells)
+            if cells:
+                break
+        return [TippyMove(divmod(cell, self.dimension))
+                for cell in sorted(cells)]
+
+    def is_tippy(self, letter):
+        '''(SparseTippyGameState, str) -> bool
+
+        Return whether there is a tippy formed by letter in game state self.
+
+        Precondition: letter is either 'x' or 'o'
+
+        Overrides is_tippy method in parent class.
+
+        >>> b = [['o', 'o', 'o'], ['x', 'o', 'o'], ['x', 'x', 'x']]
+        >>> SparseTippyGameState('p2', board=b).is_tippy('o')
+        True
+        '''
+        return self._winner == letter
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
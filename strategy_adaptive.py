@@ -0,0 +1,142 @@
+import time
+from collections import deque
+from math import comb
+from strategy import Strategy
+from strategy_minimax_myopic import StrategyMinimaxMyopic
+from strategy_minimax_prune import StrategyMinimaxPrune
+from strategy_subtraction import StrategySubtraction
+from subtraction_game_state import SubtractionGameState
+from tippy_game_state import TippyGameState
+
+
+class StrategyAdaptive(Strategy):
+    ''' Interface to suggest a move with whichever strategy suits the
+    present game state: an exact search when the states left to search can
+    be searched within the time budget, and a bounded search when they
+    cannot.
+
+    The states left are estimated from the empty tiles or the total, and
+    the speed of the exact search, in states entered per second, is
+    measured on each move it makes, so the choice adapts to the machine
+    and to the game.
+
+    budget: float          -- seconds a move may take
+    rate: float            -- states the exact search enters per second
+    exact: Strategy        -- strategy searching to the end of the game
+    bounded: Strategy      -- strategy searching a few moves ahead
+    solved: Strategy       -- strategy for solved subtraction games
+    log: deque of (str, str, str)
+                           -- for each of the latest moves suggested, the
+                              state, the strategy chosen and why
+    '''
+
+    # states per second assumed before the exact search is first timed
+    RATE = 20000.0
+
+    def __init__(self, interactive=False, budget=2.0, log_size=1000):
+        '''(StrategyAdaptive, bool, float, int) -> NoneType
+
+        Extends __init__ method from parent class Strategy.
+        self.log keeps the choices of the latest log_size moves.
+        '''
+        Strategy.__init__(self)
+        self.budget, self.rate = budget, self.RATE
+        self.exact = StrategyMinimaxPrune()
+        self.bounded = StrategyMinimaxMyopic()
+        self.solved = StrategySubtraction(fallback=self.exact)
+        self.log = deque(maxlen=log_size)
+
+    def __repr__(self):
+        '''(StrategyAdaptive) -> str
+
+        Return a string representation of StrategyAdaptive self
+        that evaluates to an equivalent strategy.
+
+        >>> S = StrategyAdaptive()
+        >>> S
+        StrategyAdaptive()
+        '''
+        return 'StrategyAdaptive()'
+
+    def __str__(self):
+        '''(StrategyAdaptive) -> str
+
+        Return a convenient string representation of strategy self.
+
+        >>> S = StrategyAdaptive()
+        >>> print(S)
+        The current strategy is adaptive.
+        '''
+        return 'The current strategy is adaptive.'
+
+    def suggest_move(self, state):
+        '''(StrategyAdaptive, GameState) -> Move
+
+        Returns a move from the present game state state found by the
+        strategy chosen for it, and records the choice in self.log.
+
+        Overrides suggest_move method in parent class.
+
+        >>> S = StrategyAdaptive()
+        >>> b = [['o', 'o', 'o'], ['-', '-', '-'], ['x', 'x', 'x']]
+        >>> S.suggest_move(TippyGameState('p2', board=b))
+        TippyMove((1, 1))
+        >>> S.log[-1][1]
+        'StrategyMinimaxPrune()'
+        >>> S.suggest_move(TippyGameState('p1', dimension=6))
+        TippyMove((2, 2))
+        >>> S.log[-1][1:]
+        ('StrategyMinimaxMyopic()', 'bounded: about 2.4e+16 states left')
+        '''
+        if (isinstance(state, SubtractionGameState) and
+                state.subtraction_set is not None):
+            strategy, reason = self.solved, 'solved: periodic subtraction set'
+        else:
+            states = self.states_left(state)
+            seconds = states / self.rate
+            if seconds <= self.budget:
+                strategy = self.exact
+                reason = 'exact: about {:.1e} states left, {:.2g}s at ' \
+                         '{:.0f} states/s'.format(states, seconds, self.rate)
+            else:
+                strategy = self.bounded
+                reason = 'bounded: about {:.1e} states left'.format(states)
+        nodes = self.exact.nodes
+        start = time.perf_counter()
+        move = strategy.suggest_move(state)
+        elapsed = time.perf_counter() - start
+        nodes = self.exact.nodes - nodes
+        if strategy is self.exact and elapsed > 0.05 and nodes > 0:
+            # time the exact search on all but trivial moves, weighting the
+            # latest timing as heavily as all before it
+            self.rate = (self.rate + nodes / elapsed) / 2
+        self.log.append((str(state), repr(strategy), reason))
+        return move
+
+    def states_left(self, state):
+        '''(StrategyAdaptive, GameState) -> float
+
+        Return an estimate of the number of distinct states reachable from
+        state, which bounds the states a search remembering the states it
+        has seen visits.
+
+        >>> S = StrategyAdaptive()
+        >>> S.states_left(TippyGameState('p1'))
+        6046.0
+        >>> from subtract_square_state import SubtractSquareState
+        >>> S.states_left(SubtractSquareState('p1', current_total=20))
+        21.0
+        '''
+        if isinstance(state, TippyGameState):
+            empty = sum(row.count('-') for row in state.board)
+            # k more pieces, split between the players as they alternate
+            return float(sum(comb(empty, k) * comb(k, k // 2)
+                             for k in range(0, empty + 1)))
+        elif isinstance(state, SubtractionGameState):
+            return float(state.current_total + 1)
+        return float('inf')
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
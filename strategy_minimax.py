@@ -1,15 +1,27 @@
+from game_state import GameState, state_key
 from strategy import Strategy
 from subtract_square_state import SubtractSquareState
 from tippy_game_state import TippyGameState
+from tippy_symmetry import unique_moves
+from search_core import negamax
 
 
 class StrategyMinimax(Strategy):
     ''' Interface to suggest a move producing the best possible outcome for
     a player assuming both players have all the information to make the best
     possible move from any game state.
-    
-    Inherits __init__ method from parent class Strategy
     '''
+
+    def __init__(self, interactive=False):
+        '''(StrategyMinimax, bool) -> NoneType
+
+        Extends __init__ method from parent class Strategy.
+        self.memo, if not None, holds the scores of game states already
+        searched under their key self.key, as memoization.memoize_score
+        sets up. self.nodes counts the game states searched.
+        '''
+        Strategy.__init__(self)
+        self.memo, self.key, self.nodes = None, state_key, 0
     
     def __repr__(self):
         '''(StrategyMinimax) -> str
@@ -34,8 +46,8 @@ class StrategyMinimax(Strategy):
         '''
         return 'StrategyMinimax()'
 
-    #  StrategyMinimax does not require an __eq__ method, since it does not
-    #  have any attributes to compare.
+    #  StrategyMinimax does not require an __eq__ method, since its
+    #  attributes do not change the moves it suggests.
     
     def suggest_move(self, state):
         '''(StrategyMinimax, GameState) -> Move
@@ -52,9 +64,14 @@ class StrategyMinimax(Strategy):
         TippyMove((1, 1))
         '''
         score_moves = []
-        for move in state.possible_next_moves():
+        # moves leading to mirror images of earlier moves' states score the
+        # same, so only the first of each is searched
+        for move in unique_moves(state):
             score = (-1) * (self.find_score(state.apply_move(move)))
             score_moves.append((score, move))
+            # only a move that wins at once scores WIN, and none does better
+            if score >= GameState.WIN:
+                break
         return max(score_moves, key=produce_max)[1]
 
     # helper function for suggest_move
@@ -68,11 +85,11 @@ class StrategyMinimax(Strategy):
         >>> b = [['o', 'o', 'o'], ['-', 'o', '-'], ['x', 'x', 'x']]
         >>> t1 = TippyGameState('p2', board = b)
         >>> S.find_score(t1)
-        -1.0
+        -0.998001
         >>> b = [['o', 'o', 'o'], ['-', '-', '-'], ['x', 'x', 'x']]
         >>> t2 = TippyGameState('p2', board = b)
         >>> S.find_score(t2)
-        1.0
+        0.997002999
         >>> row1 = ['x', 'x', 'x', 'x']
         >>> row2 = ['o', 'o', 'o', 'o']
         >>> b = [row1, row2, row1, ['o', 'o', 'o', '-']]
@@ -81,12 +98,9 @@ class StrategyMinimax(Strategy):
         -0.0
         '''
         
-        if state.over:
-            return state.outcome()
-
-        else:
-            return max(self.find_score(state.apply_move(move)) * (-1) 
-                       for move in state.possible_next_moves())
+        score, nodes = negamax(state, memo=self.memo, key=self.key)
+        self.nodes += nodes
+        return score
 
 
 def produce_max(L):
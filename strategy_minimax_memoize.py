@@ -1,6 +1,9 @@
+from game_state import GameState
 from strategy import Strategy
 from subtract_square_state import SubtractSquareState
 from tippy_game_state import TippyGameState
+from tippy_symmetry import unique_moves
+from search_core import negamax
 
 
 class StrategyMinimaxMemoize(Strategy):
@@ -10,14 +13,18 @@ class StrategyMinimaxMemoize(Strategy):
     calculating scores for equivalent game positions more than once.
     '''    
     
-    def __init__(self, interactive=False):
-        '''(StrategyMinimaxMemoize, bool) -> NoneType
+    def __init__(self, interactive=False, ms_dict=None):
+        '''(StrategyMinimaxMemoize, bool, dict) -> NoneType
 
         Extends __init__ method from parent class Strategy.
         self.ms_dict is dictionary of game states and the score they lead to.
+        It is ms_dict if given, which may be any object supporting get and
+        []= such as a SharedTranspositionTable shared with other processes.
+        self.nodes counts the game states searched.
         '''        
         Strategy.__init__(self)
-        self.ms_dict = {}
+        self.ms_dict = {} if ms_dict is None else ms_dict
+        self.nodes = 0
         
     def __repr__(self):
         '''(StrategyMinimaxMemoize) -> str
@@ -56,11 +63,11 @@ class StrategyMinimaxMemoize(Strategy):
         >>> S.suggest_move(Q)
         SubtractSquareMove(1)
         >>> S.ms_dict
-        {'Current total: 1; next player: p2': 1.0}
+        {1: 0.999}
         >>> T.suggest_move(Q)
         SubtractSquareMove(1)
         >>> T.ms_dict
-        {'Current total: 1; next player: p2': 1.0}
+        {1: 0.999}
         >>> S == T
         True
         '''
@@ -82,9 +89,14 @@ class StrategyMinimaxMemoize(Strategy):
         TippyMove((1, 1))
         '''
         score_moves = []
-        for move in state.possible_next_moves():
+        # moves leading to mirror images of earlier moves' states score the
+        # same, so only the first of each is searched
+        for move in unique_moves(state):
             score = (-1) * (self.find_score(state.apply_move(move)))
             score_moves.append((score, move))
+            # only a move that wins at once scores WIN, and none does better
+            if score >= GameState.WIN:
+                break
         return max(score_moves, key=produce_max)[1]
 
     # helper function for suggest_move
@@ -98,11 +110,11 @@ class StrategyMinimaxMemoize(Strategy):
         >>> b = [['o', 'o', 'o'], ['-', 'o', '-'], ['x', 'x', 'x']]
         >>> t1 = TippyGameState('p2', board = b)
         >>> S.find_score(t1)
-        -1.0
+        -0.998001
         >>> b = [['o', 'o', 'o'], ['-', '-', '-'], ['x', 'x', 'x']]
         >>> t2 = TippyGameState('p2', board = b)
         >>> S.find_score(t2)
-        1.0
+        0.997002999
         >>> row1 = ['x', 'x', 'x', 'x']
         >>> row2 = ['o', 'o', 'o', 'o']
         >>> b = [row1, row2, row1, ['o', 'o', 'o', '-']]
@@ -111,15 +123,9 @@ class StrategyMinimaxMemoize(Strategy):
         -0.0
         '''
         
-        if state.over:
-            return state.outcome()
-
-        else:
-            if state.__str__() not in self.ms_dict:
-                score = max(self.find_score(state.apply_move(move)) * (-1) 
-                            for move in state.possible_next_moves())
-                self.ms_dict[state.__str__()] = score
-            return self.ms_dict[state.__str__()]
+        score, nodes = negamax(state, memo=self.ms_dict)
+        self.nodes += nodes
+        return score
             
 
 def produce_max(L):
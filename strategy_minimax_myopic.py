@@ -1,6 +1,10 @@
+from game_state import GameState, state_key
 from strategy import Strategy
 from subtract_square_state import SubtractSquareState
 from tippy_game_state import TippyGameState
+from tippy_symmetry import unique_moves
+from tippy_threat_search import threat_space_search
+from search_core import negamax
 
 
 class StrategyMinimaxMyopic(Strategy):
@@ -8,9 +12,27 @@ class StrategyMinimaxMyopic(Strategy):
     a player assuming both players have all the information to make the best
     possible move from any game state, and are only looking a maximum of 3
     steps into the future.
-    
-    Inherits __init__ method from parent class Strategy
     '''
+
+    def __init__(self, interactive=False, threat_search=True, evaluate=None):
+        '''(StrategyMinimaxMyopic, bool, bool, function) -> NoneType
+
+        Extends __init__ method from parent class Strategy.
+        If threat_search, a Tippy move is first looked for by
+        threat_space_search, which finds forced wins far beyond the
+        3 steps of the minimax search.
+        self.evaluate scores the game states 3 steps ahead in place of their
+        rough_outcome if it is not None, for instance a
+        tippy_patterns.PatternEvaluation.
+        self.memo, if not None, holds the scores of game states already
+        searched under their key self.key and depth, as
+        memoization.memoize_score sets up. self.nodes counts the game states
+        searched.
+        '''
+        Strategy.__init__(self)
+        self.threat_search = threat_search
+        self.evaluate = evaluate
+        self.memo, self.key, self.nodes = None, state_key, 0
     
     def __repr__(self):
         '''(StrategyMinimaxMyopic) -> str
@@ -35,8 +57,8 @@ class StrategyMinimaxMyopic(Strategy):
         '''
         return 'The current strategy is Minimax myopia.'
 
-    #  StrategyMinimaxMyopic does not require an __eq__ method, since it does 
-    #  not have any attributes to compare.
+    #  StrategyMinimaxMyopic does not require an __eq__ method, since
+    #  threat_search does not change whether a move it suggests wins.
     
     def suggest_move(self, state):
         '''(StrategyMinimaxMyopic, GameState) -> Move
@@ -54,11 +76,24 @@ class StrategyMinimaxMyopic(Strategy):
         >>> q = SubtractSquareState('p1', current_total = 12)
         >>> S.suggest_move(q)
         SubtractSquareMove(9)
+        >>> b = [['-', '-', '-', '-'], ['-', 'o', 'o', '-'],
+        ...      ['-', '-', '-', '-'], ['x', '-', '-', 'x']]
+        >>> S.suggest_move(TippyGameState('p1', dimension=4, board=b))
+        TippyMove((0, 1))
         '''
+        if self.threat_search and isinstance(state, TippyGameState):
+            line = threat_space_search(state)
+            if line is not None:
+                return line[0]
         score_moves = []
-        for move in state.possible_next_moves():
+        # moves leading to mirror images of earlier moves' states score the
+        # same, so only the first of each is searched
+        for move in unique_moves(state):
             score = (-1) * (self.find_score(state.apply_move(move)))
             score_moves.append((score, move))
+            # only a move that wins at once scores WIN, and none does better
+            if score >= GameState.WIN:
+                break
         return max(score_moves, key=produce_max)[1]
 
     # helper function for suggest_move
@@ -71,22 +106,29 @@ class StrategyMinimaxMyopic(Strategy):
         >>> S = StrategyMinimaxMyopic()
         >>> q1 = SubtractSquareState('p1', current_total = 7)
         >>> S.find_score(q1)
-        -1.0
+        -0.996005996001
         >>> q2 = SubtractSquareState('p1', current_total = 12)
         >>> S.find_score(q2)
         -0.0
         >>> q3 = SubtractSquareState('p1', current_total = 21)
         >>> S.find_score(q3)
-        1.0
+        0.997002999
+        >>> from tippy_patterns import PatternEvaluation, train
+        >>> S = StrategyMinimaxMyopic(evaluate=PatternEvaluation(
+        ...     train(4, games=100, seed=1)))
+        >>> -1.0 < S.find_score(TippyGameState('p1', dimension=4)) < 1.0
+        True
         '''
-        
-        if state.over:
-            return state.outcome()
-        elif depth == 0:
-            return state.rough_outcome()
-        else:
-            return max(self.find_score(state.apply_move(move), depth - 1) * 
-                       (-1) for move in state.possible_next_moves())
+
+        if hasattr(self.evaluate, 'attach') and isinstance(state,
+                                                           TippyGameState):
+            # the states searched below state update its patterns move by
+            # move, instead of each rescanning its board
+            self.evaluate.attach(state)
+        score, nodes = negamax(state, depth, self.memo, self.key,
+                               self.evaluate)
+        self.nodes += nodes
+        return score
 
 
 def produce_max(L):
@@ -1,6 +1,11 @@
+from game_state import GameState
 from strategy import Strategy
 from subtract_square_state import SubtractSquareState
 from tippy_game_state import TippyGameState
+from tippy_symmetry import unique_moves
+from tippy_threat_search import threat_space_search
+from transposition_table import TranspositionTable
+from search_core import alphabeta
 
 
 class StrategyMinimaxPrune(Strategy):
@@ -8,9 +13,34 @@ class StrategyMinimaxPrune(Strategy):
     a player assuming both players have all the information to make the best
     possible move from any game state. Eliminates redundancy by ignoring any 
     potential game states that won't affect the final outcome.
-    
-    Inherits __init__ method from parent class Strategy
     '''
+
+    def __init__(self, interactive=False, table=None, max_entries=250000,
+                 threat_search=True):
+        '''(StrategyMinimaxPrune, bool, TranspositionTable, int, bool)
+        -> NoneType
+
+        Extends __init__ method from parent class Strategy.
+        self.table is a TranspositionTable holding the absolute scores, or
+        bounds on them, of game states already searched. It is table if
+        given, for instance a SharedTranspositionTable shared with other
+        processes, or else a table of at most max_entries states kept from
+        one move of a game to the next.
+        self.hints is a dictionary of game states and the index of the best
+        move found from them, which is searched first when they are met
+        again, and self.pv is the principal variation of the last search.
+        If threat_search, a forced Tippy win is first looked for by
+        threat_space_search, which is far cheaper than a full search.
+        self.nodes counts the game states searched.
+        '''
+        Strategy.__init__(self)
+        self._own_table = table is None
+        self.table = (TranspositionTable(max_entries) if table is None
+                      else table)
+        self.max_entries = max_entries
+        self.hints, self.pv = {}, []
+        self.threat_search = threat_search
+        self.nodes = 0
     
     def __repr__(self):
         '''(StrategyMinimaxPrune) -> str
@@ -35,8 +65,8 @@ class StrategyMinimaxPrune(Strategy):
         '''
         return 'The current strategy is Minimax prune.'  
     
-    #  StrategyMinimaxPrune does not require an __eq__ method, since it does 
-    #  not have any attributes to compare.    
+    #  StrategyMinimaxPrune does not require an __eq__ method, since its 
+    #  table does not change the moves it suggests.    
 
     def suggest_move(self, state):
         '''(StrategyMinimaxPrune, GameState) -> Move
@@ -52,11 +82,111 @@ class StrategyMinimaxPrune(Strategy):
         >>> S.suggest_move(t)
         TippyMove((1, 1))
         '''
-        score_moves = []
-        for move in state.possible_next_moves():
-            score = (-1) * (self.find_score(state.apply_move(move)))
-            score_moves.append((score, move))
-        return max(score_moves, key=produce_max)[1]
+        key = state.key()
+        if key not in self.hints and self.table.probe(key) is None:
+            # state was not met in the last search, so a new game began
+            self.new_game()
+        if self.threat_search and isinstance(state, TippyGameState):
+            line = threat_space_search(state)
+            if line is not None:
+                self.pv = line
+                return line[0]
+        best = self.root_search(state)[0]
+        self._hint(key, state.possible_next_moves().index(best[1]))
+        self.pv = self.principal_variation(state)
+        return best[1]
+
+    def root_search(self, state, k=1):
+        '''(StrategyMinimaxPrune, GameState, int) -> list of (float, Move)
+
+        Return the k best moves from state, or all of them if there are
+        fewer, each with its exact score for the next player of state, best
+        first; moves scoring the same are in the order they were searched.
+
+        The moves are searched one after another within a single window:
+        once k moves are scored, a later move is only searched for whether
+        it beats the worst of them. The search stops once k moves are shown
+        to win, so the moves returned are then k winning moves, though not
+        necessarily the quickest wins.
+
+        >>> S = StrategyMinimaxPrune()
+        >>> from subtract_square_state import SubtractSquareState
+        >>> s = SubtractSquareState('p1', current_total=20)
+        >>> S.root_search(s, 3)
+        [(-0.995009990004999, SubtractSquareMove(1)), \
+(-0.997002999, SubtractSquareMove(9)), (-0.999, SubtractSquareMove(16))]
+        >>> S.root_search(SubtractSquareState('p2', current_total=13), 2)
+        [(0.994014980014994, SubtractSquareMove(1)), \
+(-0.999, SubtractSquareMove(9))]
+        '''
+        lines = []
+        # moves leading to mirror images of earlier moves' states score the
+        # same, so only the first of each is searched
+        for move in unique_moves(state):
+            if len(lines) < k:
+                bound = GameState.LOSE
+            else:
+                bound = lines[-1][0]
+                if bound > GameState.DRAW:
+                    # wins score below WIN by their distance, so any
+                    # score above DRAW is a proven win
+                    break
+            # scores at or below bound only need to be shown to be so
+            if state.next_player == 'p1':
+                score = self.minimax(state.apply_move(move), bound,
+                                     GameState.WIN)
+            else:
+                score = -self.minimax(state.apply_move(move), GameState.LOSE,
+                                      -bound)
+            if len(lines) < k or score > bound:
+                i = 0
+                while i < len(lines) and lines[i][0] >= score:
+                    i += 1
+                lines.insert(i, (score, move))
+                del lines[k:]
+        return lines
+
+    def new_game(self):
+        '''(StrategyMinimaxPrune) -> NoneType
+
+        Forget the states searched so far, unless self.table was given.
+        '''
+        if self._own_table:
+            self.table.clear()
+        self.hints, self.pv = {}, []
+
+    def principal_variation(self, state):
+        '''(StrategyMinimaxPrune, GameState) -> list of Move
+
+        Return the line of best moves from state found by the searches so
+        far.
+
+        >>> S = StrategyMinimaxPrune()
+        >>> from subtract_square_state import SubtractSquareState
+        >>> s = SubtractSquareState('p1', current_total=13)
+        >>> S.suggest_move(s)
+        SubtractSquareMove(1)
+        >>> S.pv
+        [SubtractSquareMove(1), SubtractSquareMove(4), SubtractSquareMove(1), \
+SubtractSquareMove(4), SubtractSquareMove(1), SubtractSquareMove(1), \
+SubtractSquareMove(1)]
+        '''
+        line = []
+        while not state.over and state.key() in self.hints:
+            move = state.possible_next_moves()[self.hints[state.key()]]
+            line.append(move)
+            state = state.apply_move(move)
+        return line
+
+    def _hint(self, key, index):
+        '''(StrategyMinimaxPrune, str, int) -> NoneType
+
+        Record index as the index of the best move from the state of key
+        key, dropping the oldest hint if self.hints is full.
+        '''
+        if key not in self.hints and len(self.hints) >= self.max_entries:
+            del self.hints[next(iter(self.hints))]
+        self.hints[key] = index
 
     # helper function for suggest_move
     def find_score(self, state):
@@ -69,11 +199,11 @@ class StrategyMinimaxPrune(Strategy):
         >>> b = [['o', 'o', 'o'], ['-', 'o', '-'], ['x', 'x', 'x']]
         >>> t1 = TippyGameState('p2', board = b)
         >>> S.find_score(t1)
-        -1.0
+        -0.998001
         >>> b = [['o', 'o', 'o'], ['-', '-', '-'], ['x', 'x', 'x']]
         >>> t2 = TippyGameState('p2', board = b)
         >>> S.find_score(t2)
-        1.0
+        0.997002999
         >>> row1 = ['x', 'x', 'x', 'x']
         >>> row2 = ['o', 'o', 'o', 'o']
         >>> b = [row1, row2, row1, ['o', 'o', 'o', '-']]
@@ -101,35 +231,29 @@ class StrategyMinimaxPrune(Strategy):
         >>> b = [['o', 'o', 'o'], ['-', 'o', '-'], ['x', 'x', 'x']]
         >>> t1 = TippyGameState('p2', board = b)
         >>> S.minimax(t1, -1.0, 1.0)
-        1.0
+        0.998001
         >>> b = [['o', 'o', 'o'], ['-', '-', '-'], ['x', 'x', 'x']]
         >>> t2 = TippyGameState('p2', board = b)
         >>> S.minimax(t2, -1.0, 1.0)
-        -1.0
+        -0.997002999
         >>> row1 = ['x', 'x', 'x', 'x']
         >>> row2 = ['o', 'o', 'o', 'o']
         >>> b = [row1, row2, row1, ['o', 'o', 'o', '-']]
         >>> t3 = TippyGameState('p1', dimension = 4, board = b)
         >>> S.minimax(t3, -1.0, 1.0)
         -0.0
+        >>> from transposition_table import TranspositionTable
+        >>> S = StrategyMinimaxPrune(table=TranspositionTable())
+        >>> S.minimax(t2, -1.0, 1.0)
+        -0.997002999
+        >>> S.table.probe(t2.key())
+        (0.997002999, 0, 0)
         '''        
 
-        best_score = p1 if state.next_player == 'p1' else p2
-        # p1: best (highest) value that p1 can secure
-        # p2: best (lowest) value that p2 can secure
-        if state.over:
-            return (state.outcome() if state.next_player == 'p1' 
-                    else -state.outcome()) 
-        else:
-            for move in state.possible_next_moves():
-                x = self.minimax(state.apply_move(move), p1, p2)
-                best_score = (max(best_score, x) if state.next_player == 'p1' 
-                              else min(best_score, x))
-                if state.next_player == 'p1' and best_score >= p2:
-                    return best_score
-                elif state.next_player == 'p2' and best_score <= p1:
-                    return best_score
-            return best_score
+        score, nodes = alphabeta(state, p1, p2, self.table, self.hints,
+                                 self._hint)
+        self.nodes += nodes
+        return score
 
 
 def produce_max(L):
@@ -0,0 +1,212 @@
+from strategy import Strategy
+from strategy_minimax_prune import StrategyMinimaxPrune
+from subtract_square_state import SubtractSquareState
+from tippy_game_state import TippyGameState
+
+# proof or disproof number of a decided state
+INFINITY = 10 ** 9
+
+
+class _OutOfBudget(Exception):
+    '''
+    Raised to abandon a proof that has expanded too many states.
+    '''
+
+
+class StrategyProofNumber(Strategy):
+    ''' Interface to suggest a move that wins by force, found by depth-first
+    proof-number search, or else the move of a fallback strategy.
+
+    Proof-number search decides whether the attacker, the player about to
+    move at the root, can force a win. A state's proof number is the least
+    number of unsolved states that would have to be proven wins to prove
+    it one, and its disproof number the least number that would have to be
+    proven otherwise to disprove it. The search always expands the most
+    proving state, so it settles lopsided games without a full-width
+    search. A draw does not prove a win, so drawn lines are left to the
+    fallback strategy.
+
+    max_nodes: int          -- most states to expand in one proof
+    max_table: int          -- most states to remember
+    fallback: Strategy      -- strategy for states that are not won
+    table: dict of {(bool, object): [int, int]}
+                            -- whether the attacker is about to move in a
+                               state, and its key, to the proof and
+                               disproof numbers of state
+    '''
+
+    def __init__(self, interactive=False, max_nodes=1000000, max_table=500000,
+                 fallback=None):
+        '''(StrategyProofNumber, bool, int, int, Strategy) -> NoneType
+
+        Extends __init__ method from parent class Strategy.
+        fallback is StrategyMinimaxPrune() if it is None.
+        '''
+        Strategy.__init__(self)
+        self.max_nodes, self.max_table = max_nodes, max_table
+        self.fallback = (StrategyMinimaxPrune() if fallback is None
+                         else fallback)
+        self.table = {}
+        self._budget = 0
+
+    def __repr__(self):
+        '''(StrategyProofNumber) -> str
+
+        Return a string representation of StrategyProofNumber self
+        that evaluates to an equivalent strategy.
+
+        >>> S = StrategyProofNumber()
+        >>> S
+        StrategyProofNumber()
+        '''
+        return 'StrategyProofNumber()'
+
+    def __str__(self):
+        '''(StrategyProofNumber) -> str
+
+        Return a convenient string representation of strategy self.
+
+        >>> S = StrategyProofNumber()
+        >>> print(S)
+        The current strategy is proof-number search.
+        '''
+        return 'The current strategy is proof-number search.'
+
+    def suggest_move(self, state):
+        '''(StrategyProofNumber, GameState) -> Move
+
+        Returns a winning move from the present game state state if one is
+        proven, or else the move self.fallback suggests.
+
+        Overrides suggest_move method in parent class.
+
+        >>> S = StrategyProofNumber()
+        >>> b = [['o', 'o', 'o'], ['-', '-', '-'], ['x', 'x', 'x']]
+        >>> t = TippyGameState('p2', board = b)
+        >>> S.suggest_move(t)
+        TippyMove((1, 1))
+        >>> q = SubtractSquareState('p1', current_total = 20)
+        >>> S.suggest_move(q)
+        SubtractSquareMove(1)
+        >>> S = StrategyProofNumber(max_nodes=19, max_table=8)
+        >>> S.suggest_move(SubtractSquareState('p1', current_total=13))
+        SubtractSquareMove(1)
+        '''
+        if self.prove(state):
+            attacker = state.next_player
+            for move in state.possible_next_moves():
+                child = state.apply_move(move)
+                if self._numbers(child, attacker)[0] != 0:
+                    # the proof of child may have been forgotten, so it is
+                    # proven again within a budget of its own
+                    self._budget = self.max_nodes
+                    try:
+                        self._mid(child, INFINITY, INFINITY, attacker)
+                    except _OutOfBudget:
+                        continue
+                if self._numbers(child, attacker)[0] == 0:
+                    return move
+        return self.fallback.suggest_move(state)
+
+    def prove(self, state):
+        '''(StrategyProofNumber, GameState) -> bool or NoneType
+
+        Return whether the next player of state can force a win, or None if
+        that is not decided within self.max_nodes expanded states.
+
+        >>> S = StrategyProofNumber()
+        >>> S.prove(TippyGameState('p1'))
+        True
+        >>> b = [['o', 'o', 'o'], ['-', 'o', '-'], ['x', 'x', 'x']]
+        >>> S.prove(TippyGameState('p2', board = b))
+        False
+        >>> S.prove(SubtractSquareState('p1', current_total = 5))
+        False
+        >>> StrategyProofNumber(max_nodes=10).prove(TippyGameState('p1',
+        ...                                         dimension=4)) is None
+        True
+        '''
+        attacker = state.next_player
+        self._budget = self.max_nodes
+        try:
+            self._mid(state, INFINITY, INFINITY, attacker)
+        except _OutOfBudget:
+            return None
+        pn = self._numbers(state, attacker)[0]
+        return pn == 0
+
+    def _numbers(self, state, attacker):
+        '''(StrategyProofNumber, GameState, str) -> [int, int]
+
+        Return the proof and disproof numbers of state for attacker, as
+        remembered, exact if state is over, or else 1 and 1.
+        '''
+        numbers = self.table.get((state.next_player == attacker,
+                                  state.key()))
+        if numbers is not None:
+            return numbers
+        elif state.over:
+            return [0, INFINITY] if state.winner(attacker) else [INFINITY, 0]
+        return [1, 1]
+
+    def _mid(self, state, th_pn, th_dn, attacker):
+        '''(StrategyProofNumber, GameState, int, int, str) -> NoneType
+
+        Expand the most proving states below state until its proof number
+        reaches th_pn or its disproof number reaches th_dn, and remember
+        its new numbers.
+        '''
+        key = (state.next_player == attacker, state.key())
+        if state.over:
+            self.table[key] = self._numbers(state, attacker)
+            return
+        self._budget -= 1
+        if self._budget < 0:
+            raise _OutOfBudget()
+        attacking = state.next_player == attacker
+        children = [state.apply_move(move)
+                    for move in state.possible_next_moves()]
+        while True:
+            numbers = [self._numbers(child, attacker) for child in children]
+            # at the attacker's turn one child must be proven, at the
+            # defender's all of them
+            if attacking:
+                pn = min(n[0] for n in numbers)
+                dn = min(INFINITY, sum(n[1] for n in numbers))
+            else:
+                pn = min(INFINITY, sum(n[0] for n in numbers))
+                dn = min(n[1] for n in numbers)
+            if pn >= th_pn or dn >= th_dn:
+                if len(self.table) >= self.max_table:
+                    self._forget()
+                self.table[key] = [pn, dn]
+                return
+            side = 0 if attacking else 1
+            order = sorted(range(0, len(children)),
+                           key=lambda i: numbers[i][side])
+            best = order[0]
+            second = (numbers[order[1]][side] if len(order) > 1
+                      else INFINITY)
+            if attacking:
+                child_th_pn = min(th_pn, second + 1)
+                child_th_dn = min(INFINITY, th_dn - dn + numbers[best][1])
+            else:
+                child_th_pn = min(INFINITY, th_pn - pn + numbers[best][0])
+                child_th_dn = min(th_dn, second + 1)
+            self._mid(children[best], child_th_pn, child_th_dn, attacker)
+
+    def _forget(self):
+        '''(StrategyProofNumber) -> NoneType
+
+        Shrink self.table to at most half of self.max_table states by
+        forgetting the unsolved states, or all of them if that is not enough.
+        '''
+        self.table = {key: numbers for (key, numbers) in self.table.items()
+                      if numbers[0] == 0 or numbers[1] == 0}
+        if len(self.table) > self.max_table // 2:
+            self.table = {}
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,88 @@
+from strategy import Strategy
+from strategy_minimax_prune import StrategyMinimaxPrune
+from subtraction_game_state import SubtractionGameState
+from subtraction_solver import solve_subtraction
+
+
+class StrategySubtraction(Strategy):
+    ''' Interface to suggest a move producing the best possible outcome in a
+    subtraction game with a finite subtraction set, looked up in the
+    periodic solution of the set, so that a move from any total is found
+    at once. Other games are left to a fallback strategy.
+
+    fallback: Strategy         -- strategy for other games
+    solutions: dict of {tuple of int: SubtractionSolution}
+                               -- subtraction set to its solution
+    '''
+
+    def __init__(self, interactive=False, fallback=None):
+        '''(StrategySubtraction, bool, Strategy) -> NoneType
+
+        Extends __init__ method from parent class Strategy.
+        fallback is StrategyMinimaxPrune() if it is None.
+        '''
+        Strategy.__init__(self)
+        self.fallback = (StrategyMinimaxPrune() if fallback is None
+                         else fallback)
+        self.solutions = {}
+
+    def __repr__(self):
+        '''(StrategySubtraction) -> str
+
+        Return a string representation of StrategySubtraction self
+        that evaluates to an equivalent strategy.
+
+        >>> S = StrategySubtraction()
+        >>> S
+        StrategySubtraction()
+        '''
+        return 'StrategySubtraction()'
+
+    def __str__(self):
+        '''(StrategySubtraction) -> str
+
+        Return a convenient string representation of strategy self.
+
+        >>> S = StrategySubtraction()
+        >>> print(S)
+        The current strategy is subtraction game solution.
+        '''
+        return 'The current strategy is subtraction game solution.'
+
+    def suggest_move(self, state):
+        '''(StrategySubtraction, GameState) -> Move
+
+        Returns a move that would result in a best possible outcome from the
+        present game state state using Strategy self.
+
+        Overrides suggest_move method in parent class.
+
+        >>> S = StrategySubtraction()
+        >>> s = SubtractionGameState('p1', current_total=10 ** 18,
+        ...                          subtraction_set=[2, 7, 8])
+        >>> S.suggest_move(s)
+        SubtractionMove(8)
+        >>> s = SubtractionGameState('p1', current_total=20)
+        >>> S.suggest_move(s)
+        SubtractSquareMove(1)
+        '''
+        if (isinstance(state, SubtractionGameState) and
+                state.subtraction_set is not None):
+            return self.solution(state.subtraction_set).best_move(state)
+        return self.fallback.suggest_move(state)
+
+    def solution(self, subtraction_set):
+        '''(StrategySubtraction, tuple of int) -> SubtractionSolution
+
+        Return the solution of the subtraction game removing amounts in
+        subtraction_set, solving it the first time it is needed.
+        '''
+        if subtraction_set not in self.solutions:
+            self.solutions[subtraction_set] = solve_subtraction(
+                subtraction_set)
+        return self.solutions[subtraction_set]
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -2,7 +2,8 @@ from move import Move
 
 
 class SubtractSquareMove(Move):
-    ''' A move in the game of Subtract Square.
+    ''' A move in the game of Subtract Square, or in any other subtraction
+    game (refer to subtraction_game_state).
 
     amount: int -- amount to subtract from current value.
     '''
@@ -12,7 +13,7 @@ class SubtractSquareMove(Move):
 
         Initialize a new SubtractSquareMove for removing amount from value.
 
-        Assume: amount is a positive integer square.
+        Assume: amount is a positive integer that the game allows removing.
         '''
         self.amount = amount
 
@@ -24,7 +25,7 @@ class SubtractSquareMove(Move):
         >>> m1
         SubtractSquareMove(4)
         '''
-        return 'SubtractSquareMove({})'.format(str(self.amount))
+        return '{}({})'.format(type(self).__name__, str(self.amount))
 
     def __str__(self):
         ''' (SubtractSquareMove) -> str
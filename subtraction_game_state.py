@@ -0,0 +1,306 @@
+from game_state import GameState
+from subtract_square_move import SubtractSquareMove
+from subtraction_move import SubtractionMove
+from math import isqrt
+from random import randint
+
+
+class SubtractionGameState(GameState):
+    ''' The state of a subtraction game: players take turns removing an
+    amount in the subtraction set from the total, and the player who cannot
+    move loses. With no subtraction set the amounts are the positive perfect
+    squares, and the game is Subtract Square (refer to SubtractSquareState).
+
+    current_total: int              --- total to be subtracted from
+    subtraction_set: tuple of int   --- amounts that may be removed, in
+                                        increasing order, or None for the
+                                        positive perfect squares
+    '''
+    __slots__ = ('current_total', 'subtraction_set')
+
+    def __init__(self, p, interactive=False, current_total=0,
+                 subtraction_set=None):
+        ''' (SubtractionGameState, str, bool, int, iterable of int)
+        -> NoneType
+
+        Initialize SubtractionGameState self with current_total the number
+        to decrease, removing amounts in subtraction_set.
+
+        Assume:  0 <= current_total is an int
+                 subtraction_set holds positive ints, or is None
+                        p in {'p1', 'p2'}
+        '''
+        if interactive:
+            amounts = input('Amounts that may be removed, separated by '
+                            'spaces (blank for perfect squares)? ').split()
+            subtraction_set = [int(a) for a in amounts] or None
+            current_total = randint(1, int(input('Maximum starting value? ')))
+        GameState.__init__(self, p)
+        self.current_total = current_total
+        self.subtraction_set = (None if subtraction_set is None
+                                else tuple(sorted(set(subtraction_set))))
+        self.over = self.current_total < self._least()
+
+    @property
+    def instructions(self):
+        ''' (SubtractionGameState) -> str
+
+        Return the instructions of the game of self.
+
+        >>> print(SubtractionGameState('p1', current_total=9).instructions)
+        On your turn, you may remove any number so long as it is (a) a \
+perfect square, and (b) no more than the current number.
+        '''
+        return ('On your turn, you may remove any number so long as it is '
+                '(a) {}, and (b) no more than the current '
+                'number.'.format(self._amounts()))
+
+    def _least(self):
+        ''' (SubtractionGameState) -> int
+
+        Return the least amount that may be removed.
+        '''
+        return 1 if self.subtraction_set is None else self.subtraction_set[0]
+
+    def _amounts(self):
+        ''' (SubtractionGameState) -> str
+
+        Return a description of the amounts that may be removed.
+        '''
+        if self.subtraction_set is None:
+            return 'a perfect square'
+        return 'one of {}'.format(', '.join(str(a) for a in
+                                            self.subtraction_set))
+
+    def __repr__(self):
+        ''' (SubtractionGameState) -> str
+
+        Return a string representation of SubtractionGameState self
+        that evaluates to an equivalent SubtractionGameState
+
+        >>> s = SubtractionGameState('p1', current_total=17,
+        ...                          subtraction_set=[3, 1])
+        >>> s
+        SubtractionGameState('p1', False, 17, (1, 3))
+        '''
+        return 'SubtractionGameState({}, False, {}, {})'.format(
+            repr(self.next_player), repr(self.current_total),
+            repr(self.subtraction_set))
+
+    def __str__(self):
+        ''' (SubtractionGameState) -> str
+
+        Return a convenient string representation of SubtractionGameState
+        (self).
+
+        >>> s = SubtractionGameState('p1', current_total=17,
+        ...                          subtraction_set=[1, 3])
+        >>> print(s)
+        Current total: 17; remove one of 1, 3; next player: p1
+        '''
+        return ('Current total: {}; remove {}; next player: {}'.format(
+            str(self.current_total), self._amounts(), str(self.next_player)))
+
+    def __eq__(self, other):
+        ''' (SubtractionGameState, object) -> bool
+
+        Return True iff this SubtractionGameState is the equivalent to other.
+
+        >>> s1 = SubtractionGameState('p1', current_total=17)
+        >>> s2 = SubtractionGameState('p1', current_total=17)
+        >>> s3 = SubtractionGameState('p1', current_total=17,
+        ...                           subtraction_set=[1, 4, 9, 16])
+        >>> s1 == s2, s1 == s3
+        (True, False)
+        '''
+        return (isinstance(other, SubtractionGameState) and
+                self.current_total == other.current_total and
+                self.subtraction_set == other.subtraction_set and
+                self.next_player == other.next_player)
+
+    def key(self):
+        ''' (SubtractionGameState) -> bytes
+
+        Return the current total and subtraction set of self, which alone
+        decide the outcome for the next player.
+
+        Overrides key method in parent class.
+
+        >>> SubtractionGameState('p2', current_total=17,
+        ...                      subtraction_set=[1, 3]).key()
+        b'17 (1, 3)'
+        '''
+        return '{} {}'.format(self.current_total,
+                              self.subtraction_set).encode()
+
+    def apply_move(self, move):
+        ''' (SubtractionGameState, SubtractSquareMove) -> SubtractionGameState
+
+        Return the new SubtractionGameState reached by applying move to self.
+
+        >>> s1 = SubtractionGameState('p1', current_total=17,
+        ...                           subtraction_set=[2, 5])
+        >>> s2 = s1.apply_move(SubtractionMove(5))
+        >>> print(s2)
+        Current total: 12; remove one of 2, 5; next player: p2
+        >>> s1.apply_move(SubtractionMove(4)) is None
+        True
+        '''
+        amount = move.amount
+        if 0 < amount <= self.current_total and (
+                is_pos_square(amount) if self.subtraction_set is None
+                else amount in self.subtraction_set):
+            # a state of its own making needs no checking, so __init__ is
+            # skipped
+            cls = type(self)
+            new_state = cls.__new__(cls)
+            new_state.next_player = self.opponent()
+            new_state.current_total = self.current_total - amount
+            new_state.subtraction_set = self.subtraction_set
+            new_state.over = new_state.current_total < self._least()
+            return new_state
+        else:
+            return None
+
+    def rough_outcome(self):
+        '''(SubtractionGameState) -> float
+
+        Return an estimate in interval [LOSE, WIN] of best outcome next_player
+        can guarantee from state self.
+
+        >>> SubtractionGameState('p1', current_total=3,
+        ...                      subtraction_set=[2, 3]).rough_outcome()
+        1.0
+        >>> SubtractionGameState('p1', current_total=5,
+        ...                      subtraction_set=[2, 3]).rough_outcome()
+        -1.0
+        >>> SubtractionGameState('p1', current_total=7,
+        ...                      subtraction_set=[2, 3]).rough_outcome()
+        0.0
+        '''
+        # worked out on totals alone, as it is called at every leaf of a
+        # depth-limited search
+        if self.over:
+            return SubtractionGameState.LOSE
+        elif self._ends(self.current_total):
+            return SubtractionGameState.WIN
+        elif all(self._ends(self.current_total - amount)
+                 for amount in self._removable()):
+            return SubtractionGameState.LOSE
+        else:
+            return SubtractionGameState.DRAW
+
+    def _removable(self):
+        ''' (SubtractionGameState) -> iterable of int
+
+        Return the amounts that may be removed from the current total,
+        largest first.
+        '''
+        if self.subtraction_set is None:
+            return (i * i for i in range(isqrt(self.current_total), 0, -1))
+        return (a for a in reversed(self.subtraction_set)
+                if a <= self.current_total)
+
+    def _ends(self, total):
+        ''' (SubtractionGameState, int) -> bool
+
+        Return whether a move from total total leaves the opponent without
+        a move.
+
+        >>> s = SubtractionGameState('p1', subtraction_set=[2, 3])
+        >>> [s._ends(n) for n in range(0, 6)]
+        [False, False, True, True, True, False]
+        '''
+        if self.subtraction_set is None:
+            return is_pos_square(total)
+        least = self.subtraction_set[0]
+        return any(0 <= total - a < least for a in self.subtraction_set)
+
+    def forcing_moves(self):
+        ''' (SubtractionGameState) -> list of SubtractSquareMove
+
+        Return the moves leaving the opponent without a move, as they win
+        at once.
+
+        Overrides forcing_moves method in parent class.
+
+        >>> SubtractionGameState('p1', current_total=4,
+        ...                      subtraction_set=[2, 3]).forcing_moves()
+        [SubtractionMove(3)]
+        >>> SubtractionGameState('p1', current_total=7,
+        ...                      subtraction_set=[2, 3]).forcing_moves()
+        []
+        >>> SubtractionGameState('p1', current_total=16).forcing_moves()
+        [SubtractSquareMove(16)]
+        '''
+        least = self._least()
+        return [move for move in self.possible_next_moves()
+                if self.current_total - move.amount < least]
+
+    def get_move(self):
+        '''(SubtractionGameState) -> SubtractSquareMove
+
+        Prompt user and return move.
+        '''
+        return self._move_class()(int(input('Remove how much? ')))
+
+    def _move_class(self):
+        ''' (SubtractionGameState) -> type
+
+        Return the class of the moves of self: SubtractSquareMove for the
+        perfect squares, or else SubtractionMove.
+        '''
+        return (SubtractSquareMove if self.subtraction_set is None
+                else SubtractionMove)
+
+    def winner(self, player):
+        ''' (SubtractionGameState, str) -> bool
+
+        Return True iff the game is over and player has won.
+
+        >>> s1 = SubtractionGameState('p1', current_total=4,
+        ...                           subtraction_set=[1, 3])
+        >>> s2 = s1.apply_move(SubtractionMove(3))  # p1's move
+        >>> s3 = s2.apply_move(SubtractionMove(1))  # p2's move
+        >>> s3.winner('p2')
+        True
+
+        Preconditions: player is either 'p1' or 'p2'
+        '''
+        # normal play: the player left without a move loses
+        return self.over and self.opponent() == player
+
+    def possible_next_moves(self):
+        ''' (SubtractionGameState) -> list of SubtractSquareMove
+
+        Return a (possibly empty) list of moves that are legal
+        from the present state, largest first.
+
+        >>> s = SubtractionGameState('p1', current_total=10)
+        >>> s.possible_next_moves()
+        [SubtractSquareMove(9), SubtractSquareMove(4), SubtractSquareMove(1)]
+        >>> s = SubtractionGameState('p1', current_total=10,
+        ...                          subtraction_set=[3, 7, 11])
+        >>> s.possible_next_moves()
+        [SubtractionMove(7), SubtractionMove(3)]
+        '''
+        move = self._move_class()
+        return [move(amount) for amount in self._removable()]
+
+
+def is_pos_square(n):
+    '''(int) -> bool
+
+    Return whether n is a positive perfect square.
+
+    >>> is_pos_square(5)
+    False
+    >>> is_pos_square(9)
+    True
+    '''
+    return n > 0 and isqrt(n) ** 2 == n
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
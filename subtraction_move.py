@@ -0,0 +1,17 @@
+from subtract_square_move import SubtractSquareMove
+
+
+class SubtractionMove(SubtractSquareMove):
+    ''' A move in a subtraction game with a finite subtraction set, which
+    is a SubtractSquareMove under the name of its game.
+
+    >>> SubtractionMove(4)
+    SubtractionMove(4)
+    >>> SubtractionMove(4) == SubtractSquareMove(4)
+    True
+    '''
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,178 @@
+from game_state import GameState
+
+
+class SubtractionSolution:
+    '''
+    The outcome of every total of a subtraction game with a finite
+    subtraction set, and how many moves best play takes to reach the end.
+
+    A total's remoteness is the number of moves to the end of the game when
+    the player to move wins as fast and loses as slowly as possible, which
+    is how the minimax strategies, scoring by distance, play; it is odd iff
+    the player to move wins. The remoteness at a total depends only on its
+    parity and on how the remotenesses of the largest amount of totals
+    below it differ from one another, so once a run of that many
+    remotenesses repeats up to a constant rise, they repeat forever. From
+    total start on they grow by rise every period totals, and the
+    remoteness at any total, however large, is read off the first
+    start + period.
+
+    subtraction_set: tuple of int   -- amounts that may be removed
+    remoteness: list of int         -- remoteness[n] is the remoteness of
+                                       total n, for the first start + period
+                                       totals
+    start: int                      -- first total of the periodic part
+    period: int                     -- least period of the remotenesses
+    rise: int                       -- growth of the remoteness over a period
+    '''
+
+    def __init__(self, subtraction_set, remoteness, start, period, rise):
+        '''(SubtractionSolution, tuple of int, list of int, int, int, int)
+        -> NoneType
+
+        Initialize SubtractionSolution self from the remotenesses of its
+        first start + period totals.
+        '''
+        self.subtraction_set = subtraction_set
+        self.remoteness = remoteness
+        self.start, self.period, self.rise = start, period, rise
+
+    def __repr__(self):
+        '''(SubtractionSolution) -> str
+
+        Return a string representation of SubtractionSolution self.
+
+        >>> solve_subtraction([1, 2])
+        SubtractionSolution((1, 2), start=0, period=3, rise=2)
+        '''
+        return 'SubtractionSolution({}, start={}, period={}, rise={})'.format(
+            repr(self.subtraction_set), self.start, self.period, self.rise)
+
+    def remoteness_at(self, total):
+        '''(SubtractionSolution, int) -> int
+
+        Return the remoteness of total total.
+
+        >>> S = solve_subtraction([1, 3, 4])
+        >>> [S.remoteness_at(n) for n in range(0, 8)]
+        [0, 1, 2, 1, 1, 3, 3, 4]
+        >>> S.remoteness_at(10 ** 18)
+        571428571428571429
+        '''
+        if total < len(self.remoteness):
+            return self.remoteness[total]
+        (rises, offset) = divmod(total - self.start, self.period)
+        return self.remoteness[self.start + offset] + rises * self.rise
+
+    def wins_at(self, total):
+        '''(SubtractionSolution, int) -> bool
+
+        Return whether the player to move at total total wins.
+
+        >>> S = solve_subtraction([1, 3, 4])
+        >>> [S.wins_at(n) for n in range(0, 8)]
+        [False, True, False, True, True, True, True, False]
+        >>> S.wins_at(10 ** 18), S.wins_at(10 ** 18 + 1)
+        (True, False)
+        '''
+        return self.remoteness_at(total) % 2 == 1
+
+    def value(self, state):
+        '''(SubtractionSolution, SubtractionGameState) -> float
+
+        Return the outcome in {WIN, LOSE} of state for its next player,
+        assuming best play from both players.
+
+        >>> from subtraction_game_state import SubtractionGameState
+        >>> s = SubtractionGameState('p2', current_total=7,
+        ...                          subtraction_set=[1, 3, 4])
+        >>> solve_subtraction(s.subtraction_set).value(s)
+        -1.0
+        '''
+        return (GameState.WIN if self.wins_at(state.current_total)
+                else GameState.LOSE)
+
+    def best_move(self, state):
+        '''(SubtractionSolution, SubtractionGameState) -> SubtractionMove
+
+        Return the first of the moves from state that win fastest, or if
+        none wins, that lose slowest, as the minimax strategies choose it.
+
+        Precondition: not state.over
+
+        >>> from subtraction_game_state import SubtractionGameState
+        >>> s = SubtractionGameState('p1', current_total=10 ** 18 + 5,
+        ...                          subtraction_set=[1, 3, 4])
+        >>> solve_subtraction(s.subtraction_set).best_move(s)
+        SubtractionMove(4)
+        >>> s = SubtractionGameState('p1', current_total=7,
+        ...                          subtraction_set=[1, 3, 4])
+        >>> solve_subtraction(s.subtraction_set).best_move(s)
+        SubtractionMove(1)
+        '''
+        best, best_rank = None, None
+        for move in state.possible_next_moves():
+            r = self.remoteness_at(state.current_total - move.amount)
+            # a move to an even remoteness wins, the sooner the better
+            rank = (1, -r) if r % 2 == 0 else (0, r)
+            if best is None or rank > best_rank:
+                best, best_rank = move, rank
+        return best
+
+
+def solve_subtraction(subtraction_set):
+    '''(iterable of int) -> SubtractionSolution
+
+    Return the remoteness of every total of the subtraction game removing
+    amounts in subtraction_set, found bottom-up until the remotenesses
+    repeat up to a constant rise.
+
+    >>> S = solve_subtraction([2, 5, 6])
+    >>> S.start, S.period, S.rise
+    (0, 22, 6)
+    >>> S = solve_subtraction([2, 7, 8])
+    >>> S.start, S.period, S.rise
+    (17, 10, 2)
+    >>> solve_subtraction([])
+    Traceback (most recent call last):
+    ...
+    ValueError: the subtraction set must be finite and non-empty
+    '''
+    if subtraction_set is None or not subtraction_set:
+        raise ValueError('the subtraction set must be finite and non-empty')
+    amounts = tuple(sorted(set(subtraction_set)))
+    largest = amounts[-1]
+    remoteness = []
+    # the total at which each run of largest remotenesses, with the parity
+    # of its last, was first seen
+    seen = {}
+    n = 0
+    while True:
+        below = [remoteness[n - a] for a in amounts if a <= n]
+        losing = [r for r in below if r % 2 == 0]
+        if not below:
+            r = 0
+        elif losing:
+            r = 1 + min(losing)
+        else:
+            r = 1 + max(below)
+        remoteness.append(r)
+        if n >= largest - 1:
+            run = (r % 2,) + tuple(x - r for x in remoteness[n - largest + 1:])
+            if run in seen:
+                break
+            seen[run] = n
+        n += 1
+    period = n - seen[run]
+    rise = remoteness[n] - remoteness[seen[run]]
+    start = seen[run] - largest + 1
+    while (start > 0 and remoteness[start - 1] + rise ==
+           remoteness[start - 1 + period]):
+        start -= 1
+    return SubtractionSolution(amounts, remoteness[:start + period], start,
+                               period, rise)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -1,15 +1,31 @@
 from game_state import GameState
 from tippy_move import TippyMove
-from copy import deepcopy
+from tippy_threats import ThreatCounter, tippy_windows
+
+# exchange the pieces of the two players, in TippyGameState.key
+_SWAP = str.maketrans('ox', 'xo')
+_SWAP_BYTES = bytes.maketrans(b'ox', b'xo')
+
+# cache of the tippy windows holding each tile, as (row, column) pairs,
+# keyed by board dimension; refer to _forms_tippy
+_CELL_WINDOWS = {}
 
 
 class TippyGameState(GameState):
     ''' The state of a Tippy game. 
     
     dimension: int   ---   dimensions of a square board
+    board: tuple of tuple of str
+                     ---   the tiles, row by row; never changed, so the
+                           states apply_move reaches share the rows it
+                           leaves alone
     
     Inherits method outcome from parent class GameState.
     '''
+    __slots__ = ('dimension', 'board', '_threats', '_patterns', '_key')
+    instructions = ('On your turn, select the coordinate of the tile'
+                    ' you would like to place your piece on the grid'
+                    ' so long as it is empty.')
 
     def __init__(self, p, interactive=False, dimension=3, board=None):
         '''(TippyGameState, str, bool, int, list of lists) -> NoneType
@@ -26,17 +42,18 @@ class TippyGameState(GameState):
             self.dimension = int(input('What dimension grid?'))
         GameState.__init__(self, p)
         if board is None:
-            create_board = []
-            for n in range(0, self.dimension):
-                create_board.append(['-' for i in range(0, self.dimension)])
-            self.board = deepcopy(create_board)
+            self.board = (('-',) * self.dimension,) * self.dimension
         else:
-            self.board = deepcopy(board)
+            self.board = tuple(tuple(row) for row in board)
         self.over = (self.possible_next_moves() == [] or self.is_tippy('x') 
                      or self.is_tippy('o'))
-        self.instructions = ('On your turn, select the coordinate of the tile'
-                             ' you would like to place your piece on the grid'
-                             ' so long as it is empty.')
+        # built on demand by threat_counter, and carried over by apply_move
+        self._threats = None
+        # likewise, built by tippy_patterns.PatternEvaluation when it scores
+        # self
+        self._patterns = None
+        # built on demand by key, and carried over by apply_move
+        self._key = None
 
     def __repr__(self):
         '''(TippyGameState) -> str
@@ -82,6 +99,32 @@ class TippyGameState(GameState):
                 self.board == other.board and
                 self.next_player == other.next_player)
 
+    def key(self):
+        '''(TippyGameState) -> bytes
+
+        Return the board of self row by row, one byte per tile, with the
+        pieces of next_player as 'o' and those of the opponent as 'x'. It is
+        built on the first call, and states reached by apply_move from self
+        derive theirs from it instead of rescanning their board.
+
+        Overrides key method in parent class.
+
+        >>> b = [['o', 'x', '-'], ['-', 'x', '-'], ['o', '-', '-']]
+        >>> TippyGameState('p1', board=b).key()
+        b'ox--x-o--'
+        >>> TippyGameState('p2', board=b).key()
+        b'xo--o-x--'
+        >>> t = TippyGameState('p2', board=b).apply_move(TippyMove((0, 2)))
+        >>> t.key() == TippyGameState('p1', board=t.board).key()
+        True
+        '''
+        if self._key is None:
+            tiles = ''.join(map(''.join, self.board))
+            if self.next_player == 'p2':
+                tiles = tiles.translate(_SWAP)
+            self._key = tiles.encode()
+        return self._key
+
     def apply_move(self, move):
         '''(TippyState, TippyMove) -> TippyState
 
@@ -97,24 +140,82 @@ class TippyGameState(GameState):
         o - -
         - - -
         - - -
+        >>> b = [['o', 'o', '-'], ['x', 'o', '-'], ['x', 'x', '-']]
+        >>> t3 = TippyGameState('p1', board=b).apply_move(TippyMove((1, 2)))
+        >>> t3.over, t3.winner('p1')
+        (True, True)
+        >>> t3 == TippyGameState('p2', board=t3.board)
+        True
         '''
-        new_board = deepcopy(self.board)
-        if self.next_player == 'p1':
-            new_board[move.coord[0]][move.coord[1]] = 'o'
-        else:
-            new_board[move.coord[0]][move.coord[1]] = 'x'
-        
-        return TippyGameState(self.opponent(), dimension=self.dimension, 
-                              board=new_board)
+        (r, c) = move.coord
+        letter = 'o' if self.next_player == 'p1' else 'x'
+        board, row = self.board, self.board[r]
+        new_board = (board[:r] + (row[:c] + (letter,) + row[c + 1:],) +
+                     board[r + 1:])
+        # only the windows holding the new piece can have become a tippy
+        over = (_forms_tippy(new_board, self.dimension, r, c, letter) or
+                not any('-' in tiles for tiles in new_board))
+        new_state = TippyGameState._derive(self.opponent(), self.dimension,
+                                           new_board, over)
+        if self._threats is not None:
+            # only carried over once built, as building it visits every tile
+            new_state._threats = self._threats.copy()
+            new_state._threats.place(r, c, letter)
+        if self._patterns is not None:
+            new_state._patterns = self._patterns.copy()
+            new_state._patterns.place(move.coord[0], move.coord[1], letter)
+        if self._key is not None:
+            # the players change sides, and the piece just placed is the
+            # new next player's opponent's
+            cell = move.coord[0] * self.dimension + move.coord[1]
+            k = self._key.translate(_SWAP_BYTES)
+            new_state._key = k[:cell] + b'x' + k[cell + 1:]
+        return new_state
+
+    @staticmethod
+    def _derive(p, dimension, board, over):
+        '''(str, int, tuple of tuple of str, bool) -> TippyGameState
+
+        Return the TippyGameState with next player p on board, of
+        side-length dimension, which is over if over, taking board as it is
+        rather than copying and checking it as __init__ does.
+        '''
+        state = TippyGameState.__new__(TippyGameState)
+        state.next_player, state.over = p, over
+        state.dimension, state.board = dimension, board
+        state._threats = state._patterns = state._key = None
+        return state
+
+    def threat_counter(self):
+        '''(TippyGameState) -> ThreatCounter
+
+        Return the ThreatCounter of the board of self. It is built on the
+        first call, and states reached by apply_move from self start from an
+        updated copy of it instead of rescanning their board.
+
+        >>> t1 = TippyGameState('p1')
+        >>> t1.threat_counter().live['o']
+        [8, 0, 0, 0, 0]
+        >>> t2 = t1.apply_move(TippyMove((1, 1)))
+        >>> t2.threat_counter().live['o']
+        [0, 8, 0, 0, 0]
+        '''
+        if self._threats is None:
+            self._threats = ThreatCounter(self.dimension, self.board)
+        return self._threats
 
     def rough_outcome(self):
         '''(TippyGameState) -> float
 
-        Return an estimate in interval [LOSE, DRAW, WIN] of best outcome 
+        Return an estimate in interval [LOSE, WIN] of best outcome 
         next_player can guarantee from state self.
         
         Overrides rough_outcome method in parent class.
         
+        The estimate counts the tippy windows still open to each player
+        (refer to ThreatCounter.score): a pending tippy for next_player is a
+        WIN, two for the opponent are a LOSE, and other positions get a
+        graded score strictly between the two.
         
         >>> b = [['o', 'o', 'o'], ['-', 'o', '-'], ['x', 'x', 'x']]
         >>> TippyGameState('p2', board=b).rough_outcome()
@@ -127,25 +228,37 @@ class TippyGameState(GameState):
         >>> b = [row1, row2, row1, ['o', 'o', 'o', '-']]
         >>> TippyGameState('p1', dimension=4, board=b).rough_outcome()
         0.0
+        >>> b = [['-', '-', '-'], ['-', 'o', '-'], ['-', '-', '-']]
+        >>> 0.0 < TippyGameState('p1', board=b).rough_outcome() < 1.0
+        True
         '''
-        if self.next_player == 'p1':
-            letter = 'o'
-            other_letter = 'x'
-        else:
-            letter = 'x'
-            other_letter = 'o'    
-        for move in self.possible_next_moves():
-            new_state = self.apply_move(move)
-            #  if the next player can form a tippy in the next move, they win
-            if new_state.is_tippy(letter):
-                return self.WIN
-            #  if for every move the next player can make, the opponent can 
-            #  form a tippy in the move after that, the next player loses
-            elif [new_state.apply_move(move).is_tippy(other_letter)
-                  for move in new_state.possible_next_moves()]:
-                return self.LOSE
-            else:
-                return self.DRAW               
+        letter = 'o' if self.next_player == 'p1' else 'x'
+        return self.threat_counter().score(letter)
+
+    def forcing_moves(self):
+        '''(TippyGameState) -> list of TippyMove
+
+        Return the moves on which next_player forms a tippy, or if there
+        are none, those on which the opponent would, which next_player
+        must block; either way, row by row.
+
+        Overrides forcing_moves method in parent class.
+
+        >>> b = [['o', 'o', '-'], ['-', 'o', '-'], ['x', 'x', '-']]
+        >>> TippyGameState('p1', board=b).forcing_moves()
+        [TippyMove((1, 2))]
+        >>> TippyGameState('p2', board=b).forcing_moves()
+        [TippyMove((1, 2))]
+        >>> TippyGameState('p2').forcing_moves()
+        []
+        '''
+        if self.over:
+            return []
+        letter = 'o' if self.next_player == 'p1' else 'x'
+        other = 'x' if letter == 'o' else 'o'
+        counter = self.threat_counter()
+        cells = counter.completions(letter) or counter.completions(other)
+        return [TippyMove(coord) for coord in sorted(cells)]
 
     def get_move(self):
         '''(TippyGameState) -> TippyMove
@@ -327,8 +440,32 @@ class TippyGameState(GameState):
                             == letter):
                         return True
         return False
-    
-    
+
+
+def _forms_tippy(board, dimension, row, column, letter):
+    '''(tuple of tuple of str, int, int, int, str) -> bool
+
+    Return whether the piece of letter on tile (row, column) of board is
+    part of a tippy of letter.
+
+    >>> b = (('o', 'o', '-'), ('-', 'o', 'o'), ('-', '-', '-'))
+    >>> _forms_tippy(b, 3, 1, 2, 'o'), _forms_tippy(b, 3, 1, 2, 'x')
+    (True, False)
+    '''
+    if dimension not in _CELL_WINDOWS:
+        windows, cell_windows = tippy_windows(dimension)
+        _CELL_WINDOWS[dimension] = tuple(
+            tuple(tuple(divmod(cell, dimension) for cell in windows[w])
+                  for w in cell_windows[cell])
+            for cell in range(0, dimension * dimension))
+    for ((r0, c0), (r1, c1), (r2, c2), (r3, c3)) in \
+            _CELL_WINDOWS[dimension][row * dimension + column]:
+        if (board[r0][c0] == board[r1][c1] == board[r2][c2] ==
+                board[r3][c3] == letter):
+            return True
+    return False
+
+
 if __name__ == '__main__':
     import doctest
     doctest.testmod()
\ No newline at end of file
@@ -0,0 +1,345 @@
+'''
+Pattern evaluation of Tippy positions, trained by self-play.
+
+The board is covered by n-tuples: every 2 by 3 and every 3 by 2 block of
+tiles, which between them hold every tippy. The contents of a block are a
+pattern, numbered in base 3, and each shape of block has a table of
+weights, one per pattern, shared by all blocks of that shape wherever they
+lie. A position is worth the sum of the weights of its patterns, squashed
+into the open interval (LOSE, WIN); it is updated move by move by looking
+up only the blocks holding the tile of the move.
+
+Usage: python tippy_patterns.py [-d DIMENSION] [-g GAMES] [--resume] FILE
+'''
+import random
+from array import array
+from math import tanh
+from game_state import GameState
+
+# the tiles of each shape of block, as (row, column) offsets from its top
+# left tile
+SHAPES = (((0, 0), (0, 1), (0, 2), (1, 0), (1, 1), (1, 2)),
+          ((0, 0), (1, 0), (2, 0), (0, 1), (1, 1), (2, 1)))
+
+# the base 3 digit of each tile
+DIGITS = {'-': 0, 'o': 1, 'x': 2}
+
+# cache of precomputed blocks, keyed by board dimension.
+_TUPLES = {}
+
+
+def pattern_tuples(dimension):
+    '''(int) -> tuple of (tuple of (int, tuple of int),
+                          tuple of tuple of (int, int, int))
+
+    Return the blocks of a board of side-length dimension, each as its shape
+    and its tiles as flattened indices row * dimension + column, and for
+    each tile the index, shape and place value of every block holding it.
+    The result is computed once per dimension.
+
+    >>> tuples, cell_tuples = pattern_tuples(3)
+    >>> len(tuples)
+    4
+    >>> tuples[0]
+    (0, (0, 1, 2, 3, 4, 5))
+    >>> cell_tuples[4]
+    ((0, 0, 81), (1, 0, 3), (2, 1, 81), (3, 1, 3))
+    '''
+    if dimension not in _TUPLES:
+        d = dimension
+        tuples = []
+        for (shape, offsets) in enumerate(SHAPES):
+            height = max(r for (r, c) in offsets) + 1
+            width = max(c for (r, c) in offsets) + 1
+            for r in range(0, d - height + 1):
+                for c in range(0, d - width + 1):
+                    tuples.append((shape, tuple((r + i) * d + c + j
+                                                for (i, j) in offsets)))
+        cell_tuples = [[] for i in range(0, d * d)]
+        for (i, (shape, cells)) in enumerate(tuples):
+            for (k, cell) in enumerate(cells):
+                cell_tuples[cell].append((i, shape, 3 ** k))
+        _TUPLES[dimension] = (tuple(tuples),
+                              tuple(tuple(lst) for lst in cell_tuples))
+    return _TUPLES[dimension]
+
+
+class PatternWeights:
+    '''
+    The weight of every pattern of every shape of block, for p1: the higher,
+    the better the pattern is for p1.
+
+    tables: list of array of float   -- tables[shape][pattern]
+    '''
+
+    def __init__(self, tables=None):
+        '''(PatternWeights, list of array) -> NoneType
+
+        Initialize PatternWeights self with tables if given, or else with
+        every weight 0.
+        '''
+        if tables is None:
+            tables = [array('d', [0.0]) * (3 ** len(offsets))
+                      for offsets in SHAPES]
+        self.tables = tables
+
+    def save(self, path):
+        '''(PatternWeights, str) -> NoneType
+
+        Write the tables of self to file path, one after the other.
+        '''
+        with open(path, 'wb') as f:
+            for table in self.tables:
+                table.tofile(f)
+
+    @staticmethod
+    def load(path):
+        '''(str) -> PatternWeights
+
+        Return the PatternWeights saved in file path.
+
+        >>> import os, tempfile
+        >>> path = os.path.join(tempfile.mkdtemp(), 'weights')
+        >>> W = PatternWeights()
+        >>> W.tables[1][5] = 0.25
+        >>> W.save(path)
+        >>> PatternWeights.load(path).tables == W.tables
+        True
+        '''
+        tables = []
+        with open(path, 'rb') as f:
+            for offsets in SHAPES:
+                table = array('d')
+                table.fromfile(f, 3 ** len(offsets))
+                tables.append(table)
+        return PatternWeights(tables)
+
+
+class PatternEvaluator:
+    '''
+    Incremental sum of the weights of the patterns on a board.
+
+    weights: PatternWeights   -- the weights summed
+    dimension: int            -- side-length of the board
+    codes: list of int        -- the pattern in each block
+    total: float              -- the sum of the weights of the patterns
+    '''
+
+    def __init__(self, weights, dimension, board=None):
+        '''(PatternEvaluator, PatternWeights, int, list of lists) -> NoneType
+
+        Initialize PatternEvaluator self for a board of side-length
+        dimension, counting the pieces already on board if it is given.
+
+        >>> W = PatternWeights()
+        >>> W.tables[0][0] = 0.5
+        >>> PatternEvaluator(W, 3).total
+        1.0
+        '''
+        self.weights, self.dimension = weights, dimension
+        tuples = pattern_tuples(dimension)[0]
+        self.codes = [0] * len(tuples)
+        self.total = sum(weights.tables[shape][0] for (shape, cells)
+                         in tuples)
+        if board is not None:
+            for r in range(0, dimension):
+                for c in range(0, dimension):
+                    if board[r][c] != '-':
+                        self.place(r, c, board[r][c])
+
+    def copy(self):
+        '''(PatternEvaluator) -> PatternEvaluator
+
+        Return an independent copy of PatternEvaluator self.
+        '''
+        new = PatternEvaluator.__new__(PatternEvaluator)
+        new.weights, new.dimension = self.weights, self.dimension
+        new.codes, new.total = self.codes[:], self.total
+        return new
+
+    def place(self, row, column, letter):
+        '''(PatternEvaluator, int, int, str) -> NoneType
+
+        Record a piece of letter on the empty tile (row, column), looking up
+        only the blocks that hold it.
+
+        Precondition: letter is either 'x' or 'o'
+
+        >>> W = PatternWeights()
+        >>> W.tables[0][1] = 0.5
+        >>> E = PatternEvaluator(W, 3)
+        >>> E.place(0, 0, 'o')
+        >>> E.total
+        0.5
+        '''
+        tables, codes = self.weights.tables, self.codes
+        digit = DIGITS[letter]
+        cell = row * self.dimension + column
+        for (i, shape, power) in pattern_tuples(self.dimension)[1][cell]:
+            old = codes[i]
+            codes[i] = old + digit * power
+            self.total += tables[shape][codes[i]] - tables[shape][old]
+
+    def score(self, letter):
+        '''(PatternEvaluator, str) -> float
+
+        Return an estimate in the open interval (LOSE, WIN) of the outcome
+        for letter.
+
+        >>> W = PatternWeights()
+        >>> W.tables[0][1] = 0.5
+        >>> E = PatternEvaluator(W, 3, [['o', '-', '-'], ['-', '-', '-'],
+        ...                             ['-', '-', '-']])
+        >>> E.score('o') == -E.score('x') > 0.0
+        True
+        '''
+        value = tanh(self.total)
+        return value if letter == 'o' else -value
+
+
+class PatternEvaluation:
+    '''
+    A leaf evaluation for depth-limited searches (refer to
+    search_core.Negamax) by the weights of the patterns on Tippy boards.
+
+    Other game states are scored by their rough_outcome.
+
+    weights: PatternWeights   -- the weights of the patterns
+    '''
+
+    def __init__(self, weights):
+        '''(PatternEvaluation, PatternWeights) -> NoneType
+
+        Initialize PatternEvaluation self to evaluate by weights.
+        '''
+        self.weights = weights
+
+    def attach(self, state):
+        '''(PatternEvaluation, GameState) -> PatternEvaluator
+
+        Return the PatternEvaluator of the board of Tippy state state. It is
+        built on the first call, and states reached by apply_move from state
+        start from an updated copy of it instead of rescanning their board.
+        '''
+        counter = getattr(state, '_patterns', None)
+        if counter is None or counter.weights is not self.weights:
+            counter = PatternEvaluator(self.weights, state.dimension,
+                                       state.board)
+            state._patterns = counter
+        return counter
+
+    def __call__(self, state):
+        '''(PatternEvaluation, GameState) -> float
+
+        Return an estimate in interval [LOSE, WIN] of the best outcome the
+        next player of state can guarantee.
+
+        >>> from tippy_game_state import TippyGameState
+        >>> from tippy_move import TippyMove
+        >>> W = PatternWeights()
+        >>> W.tables[0][1] = 0.5
+        >>> E = PatternEvaluation(W)
+        >>> t = TippyGameState('p1').apply_move(TippyMove((0, 0)))
+        >>> E(t) < 0.0
+        True
+        >>> from subtract_square_state import SubtractSquareState
+        >>> E(SubtractSquareState('p1', current_total=16))
+        1.0
+        '''
+        if not hasattr(state, 'board') or not hasattr(state, 'dimension'):
+            return state.rough_outcome()
+        letter = 'o' if state.next_player == 'p1' else 'x'
+        return self.attach(state).score(letter)
+
+
+def train(dimension=4, games=1000, weights=None, rate=0.01, explore=0.1,
+          seed=None):
+    '''(int, int, PatternWeights, float, float, object) -> PatternWeights
+
+    Return weights, or new weights if none are given, fitted by temporal
+    difference learning to games self-played on a board of side-length
+    dimension. Each player plays the move whose position the weights score
+    best for them, or, with probability explore, a random move; after each
+    move the weights of the previous position are moved by rate towards the
+    score of the new one, or towards the outcome once the game is over.
+
+    >>> from tippy_game_state import TippyGameState
+    >>> W = train(3, games=300, seed=1)
+    >>> b = [['o', 'o', '-'], ['-', 'o', '-'], ['x', 'x', '-']]
+    >>> PatternEvaluator(W, 3, b).score('o') > 0.0
+    True
+    '''
+    from tippy_game_state import TippyGameState
+    if weights is None:
+        weights = PatternWeights()
+    rng = random.Random(seed)
+    tables = weights.tables
+    tuples = pattern_tuples(dimension)[0]
+    for game in range(0, games):
+        state = TippyGameState('p1', dimension=dimension)
+        counter = PatternEvaluator(weights, dimension)
+        while not state.over:
+            letter = 'o' if state.next_player == 'p1' else 'x'
+            moves = state.possible_next_moves()
+            if rng.random() < explore:
+                move = rng.choice(moves)
+            else:
+                wins = state.threat_counter().completions(letter)
+                move = max(moves, key=lambda m: _afterstate_value(
+                    counter, m, letter, wins))
+            after = counter.copy()
+            after.place(move.coord[0], move.coord[1], letter)
+            state = state.apply_move(move)
+            if state.over:
+                # scored for p1, as the weights are
+                target = (GameState.WIN if state.winner('p1') else
+                          GameState.LOSE if state.winner('p2') else
+                          GameState.DRAW)
+            else:
+                target = tanh(after.total)
+            value = tanh(counter.total)
+            step = rate * (target - value) * (1.0 - value * value)
+            for (i, (shape, cells)) in enumerate(tuples):
+                tables[shape][counter.codes[i]] += step
+            # the weights changed under after, so its total is refreshed
+            counter = PatternEvaluator(weights, dimension, state.board)
+    return weights
+
+
+def _afterstate_value(counter, move, letter, wins):
+    '''(PatternEvaluator, TippyMove, str, set of (int, int)) -> float
+
+    Return the score for letter, about to move in a position with patterns
+    counter and winning tiles wins, of the position move leads to.
+    '''
+    if move.coord in wins:
+        return GameState.WIN
+    after = counter.copy()
+    after.place(move.coord[0], move.coord[1], letter)
+    return after.score(letter)
+
+
+def main(argv=None):
+    '''(list of str) -> NoneType
+
+    Run the command line interface with arguments argv.
+    '''
+    import argparse
+    parser = argparse.ArgumentParser(
+        description='Train Tippy pattern weights by self-play.')
+    parser.add_argument('file', help='file to save the weights to')
+    parser.add_argument('-d', '--dimension', type=int, default=4,
+                        help='side-length of the boards played on')
+    parser.add_argument('-g', '--games', type=int, default=1000,
+                        help='games to self-play')
+    parser.add_argument('--resume', action='store_true',
+                        help='go on training the weights saved in file')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='seed of the random moves')
+    args = parser.parse_args(argv)
+    weights = PatternWeights.load(args.file) if args.resume else None
+    train(args.dimension, args.games, weights, seed=args.seed).save(args.file)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+from tippy_game_state import TippyGameState
+
+# cache of the eight rotations and reflections of the board, as
+# permutations of the flattened cells, keyed by board dimension
+_TRANSFORMS = {}
+
+
+def board_transforms(dimension):
+    '''(int) -> list of tuple of int
+
+    Return the rotations and reflections of a board of side-length
+    dimension. Each is a permutation p of the flattened cells
+    row * dimension + column, taking cell i to cell p[i]. The four tippy
+    shapes are carried onto each other by all of them, so each maps a
+    game onto an equivalent one. The identity comes first.
+
+    >>> transforms = board_transforms(3)
+    >>> len(transforms), transforms[0]
+    (8, (0, 1, 2, 3, 4, 5, 6, 7, 8))
+    '''
+    if dimension not in _TRANSFORMS:
+        d = dimension
+        maps = [lambda r, c: (r, c), lambda r, c: (c, d - 1 - r),
+                lambda r, c: (d - 1 - r, d - 1 - c),
+                lambda r, c: (d - 1 - c, r), lambda r, c: (r, d - 1 - c),
+                lambda r, c: (d - 1 - r, c), lambda r, c: (c, r),
+                lambda r, c: (d - 1 - c, d - 1 - r)]
+        transforms = []
+        for f in maps:
+            cells = []
+            for r in range(0, d):
+                for c in range(0, d):
+                    (r2, c2) = f(r, c)
+                    cells.append(r2 * d + c2)
+            transforms.append(tuple(cells))
+        _TRANSFORMS[dimension] = transforms
+    return _TRANSFORMS[dimension]
+
+
+def symmetries(state):
+    '''(TippyGameState) -> list of tuple of int
+
+    Return the rotations and reflections, as in board_transforms, that
+    leave the board of state unchanged.
+
+    >>> len(symmetries(TippyGameState('p1', dimension=4)))
+    8
+    >>> b = [['o', '-', '-'], ['-', 'x', '-'], ['-', '-', 'o']]
+    >>> len(symmetries(TippyGameState('p1', board=b)))
+    4
+    >>> b = [['o', 'x', '-'], ['-', '-', '-'], ['-', '-', '-']]
+    >>> len(symmetries(TippyGameState('p1', board=b)))
+    1
+    '''
+    cells = [tile for row in state.board for tile in row]
+    return [p for p in board_transforms(state.dimension)
+            if all(cells[p[i]] == cells[i] for i in range(0, len(cells)))]
+
+
+def unique_moves(state):
+    '''(GameState) -> list of Move
+
+    Return the moves from state, leaving out every move that a symmetry of
+    the board of a TippyGameState maps onto an earlier move. The moves
+    left out lead to mirror images of the positions the earlier ones lead
+    to, so they score the same, and the first move of the best score is
+    among those returned. Moves from other states are all returned.
+
+    >>> moves = unique_moves(TippyGameState('p1', dimension=4))
+    >>> moves
+    [TippyMove((0, 0)), TippyMove((0, 1)), TippyMove((1, 1))]
+    >>> b = [['o', '-', '-'], ['-', 'x', '-'], ['-', '-', 'o']]
+    >>> len(unique_moves(TippyGameState('p1', board=b)))
+    2
+    '''
+    moves = state.possible_next_moves()
+    if not isinstance(state, TippyGameState):
+        return moves
+    group = symmetries(state)
+    if len(group) == 1:
+        return moves
+    d = state.dimension
+    seen, unique = set(), []
+    for move in moves:
+        cell = move.coord[0] * d + move.coord[1]
+        if cell not in seen:
+            unique.append(move)
+            seen.update(p[cell] for p in group)
+    return unique
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
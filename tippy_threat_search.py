@@ -0,0 +1,150 @@
+from tippy_move import TippyMove
+from tippy_threats import tippy_windows
+
+
+class _OutOfNodes(Exception):
+    '''
+    Raised to abandon a threat-space search that has tried too many states.
+    '''
+
+
+def threat_space_search(state, max_depth=None, max_nodes=100000):
+    '''(TippyGameState, int, int) -> list of TippyMove or NoneType
+
+    Return a line of moves from state by which its next player, the
+    attacker, wins by force, or None if none is found.
+
+    Only forcing lines are searched: every move of the attacker's either
+    forms a tippy, or threatens one, leaving the defender a single tile to
+    block, or blocks a threat of the defender's while threatening one. The
+    defender's moves are the forced blocks, so the search follows a single
+    move at each of the defender's turns and reaches far deeper than a
+    full-width search. A line ends with the tippy, or with a double threat
+    that cannot be blocked. The attacker plays at most max_depth moves, by
+    default as many as the board has tiles, and the search gives up after
+    max_nodes states.
+
+    >>> from tippy_game_state import TippyGameState
+    >>> b = [['o', 'o', '-'], ['-', 'o', '-'], ['-', '-', 'x']]
+    >>> threat_space_search(TippyGameState('p1', board=b))
+    [TippyMove((1, 2))]
+    >>> b = [['-', '-', '-', '-'], ['-', 'o', 'o', '-'],
+    ...      ['-', '-', '-', '-'], ['x', '-', '-', 'x']]
+    >>> threat_space_search(TippyGameState('p1', dimension=4, board=b))
+    [TippyMove((0, 1))]
+    >>> b = [['-', '-', '-', '-', '-', '-', '-'],
+    ...      ['o', '-', '-', '-', '-', 'x', 'o'],
+    ...      ['x', '-', '-', '-', 'x', '-', '-'],
+    ...      ['o', '-', '-', '-', '-', '-', '-'],
+    ...      ['-', '-', 'x', 'x', '-', '-', '-'],
+    ...      ['x', '-', '-', 'o', '-', 'x', 'o'],
+    ...      ['-', 'o', '-', '-', '-', '-', 'o']]
+    >>> line = threat_space_search(TippyGameState('p1', dimension=7,
+    ...                                           board=b))
+    >>> len(line), line[:3]
+    (17, [TippyMove((5, 2)), TippyMove((6, 2)), TippyMove((5, 1))])
+    '''
+    if state.over:
+        return None
+    counter = state.threat_counter().copy()
+    attacker = 'o' if state.next_player == 'p1' else 'x'
+    if max_depth is None:
+        max_depth = state.dimension * state.dimension
+    search = _ThreatSearch(counter, attacker, max_nodes)
+    try:
+        line = search.attack(max_depth)
+    except _OutOfNodes:
+        return None
+    return None if line is None else [TippyMove(coord) for coord in line]
+
+
+class _ThreatSearch:
+    '''
+    The state of one threat-space search.
+
+    counter: ThreatCounter       -- the board searched, changed in place
+    attacker: str                -- letter of the player trying to win
+    defender: str                -- letter of the other player
+    nodes: int                   -- states tried so far
+    max_nodes: int               -- most states to try
+    failed: dict of {str: int}   -- board to the most attacker moves with
+                                    which no forced win was found from it
+    '''
+
+    def __init__(self, counter, attacker, max_nodes):
+        '''(_ThreatSearch, ThreatCounter, str, int) -> NoneType
+        '''
+        self.counter, self.attacker = counter, attacker
+        self.defender = 'x' if attacker == 'o' else 'o'
+        self.nodes, self.max_nodes = 0, max_nodes
+        self.failed = {}
+
+    def attack(self, depth):
+        '''(_ThreatSearch, int) -> list of (int, int) or NoneType
+
+        Return the tiles of a forced win for the attacker, to move, in at
+        most depth of its moves, or None if there is none.
+        '''
+        counter, attacker, defender = (self.counter, self.attacker,
+                                       self.defender)
+        wins = counter.completions(attacker)
+        if wins:
+            return [min(wins)]
+        if depth <= 1:
+            return None
+        key = ''.join(counter.cells)
+        if self.failed.get(key, 0) >= depth:
+            return None
+        self.nodes += 1
+        if self.nodes > self.max_nodes:
+            raise _OutOfNodes()
+        blocks = counter.completions(defender)
+        if len(blocks) > 1:
+            # the defender has a double threat of its own
+            self.failed[key] = depth
+            return None
+        # with a threat against it the attacker must block, and otherwise
+        # it must threaten
+        for tile in sorted(blocks) if blocks else self._threatening_tiles():
+            line = None
+            counter.place(tile[0], tile[1], attacker)
+            wins = counter.completions(attacker)
+            if len(wins) > 1:
+                line = [tile]
+            elif len(wins) == 1:
+                reply = wins.pop()
+                counter.place(reply[0], reply[1], defender)
+                if not counter.has_tippy(defender):
+                    rest = self.attack(depth - 1)
+                    if rest is not None:
+                        line = [tile, reply] + rest
+                counter.remove(reply[0], reply[1])
+            counter.remove(tile[0], tile[1])
+            if line is not None:
+                return line
+        self.failed[key] = depth
+        return None
+
+    def _threatening_tiles(self):
+        '''(_ThreatSearch) -> list of (int, int)
+
+        Return the empty tiles on which the attacker would threaten a tippy,
+        those that would threaten most first.
+        '''
+        counter = self.counter
+        windows = tippy_windows(counter.dimension)[0]
+        own = counter.counts[self.attacker]
+        other = counter.counts[self.defender]
+        made = {}
+        for (w, window) in enumerate(windows):
+            if own[w] == 2 and other[w] == 0:
+                for cell in window:
+                    if counter.cells[cell] == '-':
+                        made[cell] = made.get(cell, 0) + 1
+        cells = sorted(made, key=lambda cell: (-made[cell], cell))
+        return [divmod(cell, counter.dimension) for cell in cells]
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
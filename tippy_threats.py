@@ -0,0 +1,247 @@
+from game_state import GameState
+
+# cache of precomputed tippy windows, keyed by board dimension.
+_WINDOWS = {}
+
+
+def tippy_windows(dimension):
+    '''(int) -> tuple of (tuple of tuple of int, tuple of tuple of int)
+
+    Return the tippy windows of a board of side-length dimension, and for
+    each cell the indices of the windows that contain it. A window is the
+    four cells, as flattened indices row * dimension + column, that form a
+    tippy (refer to the legend in tippy_game_state). The result is computed
+    once per dimension.
+
+    >>> windows, cell_windows = tippy_windows(3)
+    >>> len(windows)
+    8
+    >>> windows[0]
+    (0, 3, 4, 7)
+    >>> len(cell_windows[4])
+    8
+    '''
+    if dimension not in _WINDOWS:
+        d = dimension
+        windows = []
+        for r in range(0, d - 2):
+            for c in range(0, d - 1):
+                # tippy1 and tippy2
+                windows.append(((r * d + c), (r + 1) * d + c,
+                                (r + 1) * d + c + 1, (r + 2) * d + c + 1))
+                windows.append(((r + 2) * d + c, (r + 1) * d + c,
+                                (r + 1) * d + c + 1, r * d + c + 1))
+        for r in range(0, d - 1):
+            for c in range(0, d - 2):
+                # tippy3 and tippy4
+                windows.append((r * d + c, r * d + c + 1,
+                                (r + 1) * d + c + 1, (r + 1) * d + c + 2))
+                windows.append(((r + 1) * d + c, r * d + c + 1,
+                                (r + 1) * d + c + 1, r * d + c + 2))
+        cell_windows = [[] for i in range(0, d * d)]
+        for w, window in enumerate(windows):
+            for cell in window:
+                cell_windows[cell].append(w)
+        _WINDOWS[dimension] = (tuple(windows),
+                               tuple(tuple(lst) for lst in cell_windows))
+    return _WINDOWS[dimension]
+
+
+class ThreatCounter:
+    '''
+    Incremental count of the tippy windows each player can still complete.
+
+    A window is live for a letter while it holds none of the opponent's
+    pieces. A live window holding three of a letter's pieces is a threat:
+    the letter forms a tippy by filling its last cell.
+
+    dimension: int           -- side-length of the board
+    cells: list of str       -- the board, flattened row by row
+    counts: dict of {str: list of int}
+                             -- pieces of each letter in each window
+    live: dict of {str: list of int}
+                             -- live[letter][k] is the number of windows
+                                live for letter holding k of its pieces
+    threats: dict of {str: set of int}
+                             -- windows that are threats for each letter
+    '''
+
+    # weights of live windows holding 0, 1, 2 or 3 pieces, and the scale
+    # that squashes the weighted balance into the open interval (-1, 1)
+    WEIGHTS = (0, 1, 4, 16)
+    SCALE = 16.0
+
+    def __init__(self, dimension, board=None):
+        '''(ThreatCounter, int, list of lists) -> NoneType
+
+        Initialize ThreatCounter self for a board of side-length dimension,
+        counting the pieces already on board if it is given.
+
+        >>> b = [['o', 'o', '-'], ['-', 'x', '-'], ['-', '-', '-']]
+        >>> c = ThreatCounter(3, b)
+        >>> c.live['o']
+        [0, 0, 0, 0, 0]
+        >>> c.live['x']
+        [0, 3, 0, 0, 0]
+        '''
+        self.dimension = dimension
+        windows = tippy_windows(dimension)[0]
+        self.cells = ['-'] * (dimension * dimension)
+        self.counts = {'o': [0] * len(windows), 'x': [0] * len(windows)}
+        self.live = {'o': [len(windows), 0, 0, 0, 0],
+                     'x': [len(windows), 0, 0, 0, 0]}
+        self.threats = {'o': set(), 'x': set()}
+        if board is not None:
+            for r in range(0, dimension):
+                for c in range(0, dimension):
+                    if board[r][c] != '-':
+                        self.place(r, c, board[r][c])
+
+    def copy(self):
+        '''(ThreatCounter) -> ThreatCounter
+
+        Return an independent copy of ThreatCounter self.
+
+        >>> c1 = ThreatCounter(3)
+        >>> c2 = c1.copy()
+        >>> c2.place(0, 0, 'o')
+        >>> c1.cells[0], c2.cells[0]
+        ('-', 'o')
+        '''
+        new = ThreatCounter.__new__(ThreatCounter)
+        new.dimension = self.dimension
+        new.cells = self.cells[:]
+        new.counts = {'o': self.counts['o'][:], 'x': self.counts['x'][:]}
+        new.live = {'o': self.live['o'][:], 'x': self.live['x'][:]}
+        new.threats = {'o': set(self.threats['o']),
+                       'x': set(self.threats['x'])}
+        return new
+
+    def place(self, row, column, letter):
+        '''(ThreatCounter, int, int, str) -> NoneType
+
+        Record a piece of letter on the empty tile (row, column), updating
+        only the windows that contain it.
+
+        Precondition: letter is either 'x' or 'o'
+
+        >>> c = ThreatCounter(3)
+        >>> for coord in [(0, 0), (0, 1), (1, 1)]:
+        ...     c.place(coord[0], coord[1], 'o')
+        >>> sorted(c.completions('o'))
+        [(1, 2)]
+        '''
+        other = 'x' if letter == 'o' else 'o'
+        own_counts, other_counts = self.counts[letter], self.counts[other]
+        own_live, other_live = self.live[letter], self.live[other]
+        cell = row * self.dimension + column
+        self.cells[cell] = letter
+        for w in tippy_windows(self.dimension)[1][cell]:
+            own, opp = own_counts[w], other_counts[w]
+            if opp == 0:
+                own_live[own] -= 1
+                own_live[own + 1] += 1
+                if own == 2:
+                    self.threats[letter].add(w)
+                elif own == 3:
+                    self.threats[letter].discard(w)
+            if own == 0:
+                # the window was live for the opponent, and is now dead
+                other_live[opp] -= 1
+                if opp == 3:
+                    self.threats[other].discard(w)
+            own_counts[w] = own + 1
+
+    def remove(self, row, column):
+        '''(ThreatCounter, int, int) -> NoneType
+
+        Take back the piece on tile (row, column), undoing place.
+
+        >>> c = ThreatCounter(3)
+        >>> c.place(1, 1, 'x')
+        >>> c.remove(1, 1)
+        >>> c.live['x'] == ThreatCounter(3).live['x']
+        True
+        '''
+        cell = row * self.dimension + column
+        letter = self.cells[cell]
+        other = 'x' if letter == 'o' else 'o'
+        own_counts, other_counts = self.counts[letter], self.counts[other]
+        own_live, other_live = self.live[letter], self.live[other]
+        self.cells[cell] = '-'
+        for w in tippy_windows(self.dimension)[1][cell]:
+            own, opp = own_counts[w] - 1, other_counts[w]
+            if opp == 0:
+                own_live[own + 1] -= 1
+                own_live[own] += 1
+                if own == 2:
+                    self.threats[letter].discard(w)
+                elif own == 3:
+                    self.threats[letter].add(w)
+            if own == 0:
+                other_live[opp] += 1
+                if opp == 3:
+                    self.threats[other].add(w)
+            own_counts[w] = own
+
+    def has_tippy(self, letter):
+        '''(ThreatCounter, str) -> bool
+
+        Return whether letter has formed a tippy.
+
+        >>> c = ThreatCounter(3, [['o', 'o', '-'], ['-', 'o', 'o'],
+        ...                       ['-', '-', '-']])
+        >>> c.has_tippy('o'), c.has_tippy('x')
+        (True, False)
+        '''
+        return self.live[letter][4] > 0
+
+    def completions(self, letter):
+        '''(ThreatCounter, str) -> set of (int, int)
+
+        Return the empty tiles on which letter would form a tippy.
+
+        >>> c = ThreatCounter(3, [['x', 'x', 'x'], ['-', 'x', '-'],
+        ...                       ['-', '-', 'o']])
+        >>> sorted(c.completions('x'))
+        [(1, 0), (1, 2)]
+        '''
+        windows = tippy_windows(self.dimension)[0]
+        cells = set()
+        for w in self.threats[letter]:
+            for cell in windows[w]:
+                if self.cells[cell] == '-':
+                    cells.add(divmod(cell, self.dimension))
+        return cells
+
+    def score(self, letter):
+        '''(ThreatCounter, str) -> float
+
+        Return an estimate in interval [LOSE, WIN] of the outcome for
+        letter, which is about to move. A threat of letter's is a win, two
+        threats of the opponent's on different tiles are a loss, and
+        otherwise the weighted balance of live windows is scaled into the
+        open interval (LOSE, WIN).
+
+        >>> b = [['o', 'o', 'o'], ['-', '-', '-'], ['-', '-', 'x']]
+        >>> c = ThreatCounter(3, b)
+        >>> c.score('x') < 0.0 < c.score('o') < 1.0
+        True
+        >>> c.place(1, 1, 'o')
+        >>> c.score('x')
+        -1.0
+        '''
+        other = 'x' if letter == 'o' else 'o'
+        if self.has_tippy(letter) or self.threats[letter]:
+            return GameState.WIN
+        elif self.has_tippy(other) or len(self.completions(other)) >= 2:
+            return GameState.LOSE
+        own_live, other_live = self.live[letter], self.live[other]
+        balance = sum(self.WEIGHTS[k] * (own_live[k] - other_live[k])
+                      for k in range(1, 4))
+        return balance / (abs(balance) + self.SCALE)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,322 @@
+from hashlib import blake2b
+from struct import Struct
+
+# kinds of score held in a table entry: the exact score of the state, or a
+# bound left by an alpha-beta cutoff
+EXACT, LOWER, UPPER = 0, 1, 2
+
+_DOUBLE, _WORD = Struct('<d'), Struct('<Q')
+_MASK = (1 << 64) - 1
+
+
+def hash_key(key):
+    '''(object) -> int
+
+    Return a non-zero 64-bit hash of state key key that, unlike hash, is the
+    same in every process.
+
+    >>> hash_key('Current total: 1; next player: p2') == \\
+    ...     hash_key('Current total: 1; next player: p2')
+    True
+    >>> hash_key(1) != hash_key(2)
+    True
+    '''
+    if isinstance(key, int):
+        # splitmix64 finalizer
+        h = (key + 0x9e3779b97f4a7c15) & _MASK
+        h = ((h ^ (h >> 30)) * 0xbf58476d1ce4e5b9) & _MASK
+        h = ((h ^ (h >> 27)) * 0x94d049bb133111eb) & _MASK
+        h ^= h >> 31
+    else:
+        data = key if isinstance(key, bytes) else repr(key).encode()
+        h = int.from_bytes(blake2b(data, digest_size=8).digest(), 'little')
+    return h or 1
+
+
+class TranspositionTable:
+    '''
+    Scores of game states seen during a search, for a single process.
+
+    A TranspositionTable can stand in for the moves to score dictionary of
+    StrategyMinimaxMemoize, and holds the bounded scores of
+    StrategyMinimaxPrune.
+
+    entries: dict of {object: (float, int, int)}
+                      -- state key to score, kind of score and search depth
+    max_entries: int  -- most entries held, or None for no limit; the oldest
+                         entries are dropped to make room
+    '''
+
+    def __init__(self, max_entries=None):
+        '''(TranspositionTable, int) -> NoneType
+
+        Initialize an empty TranspositionTable self of at most max_entries
+        entries.
+        '''
+        self.entries = {}
+        self.max_entries = max_entries
+
+    def __len__(self):
+        '''(TranspositionTable) -> int
+
+        Return the number of entries in self.
+        '''
+        return len(self.entries)
+
+    def probe(self, key):
+        '''(TranspositionTable, object) -> (float, int, int) or NoneType
+
+        Return the score, kind of score and depth stored for key, or None.
+
+        >>> T = TranspositionTable()
+        >>> T.store('a', 1.0, LOWER)
+        >>> T.probe('a')
+        (1.0, 1, 0)
+        >>> T.probe('b') is None
+        True
+        '''
+        return self.entries.get(key)
+
+    def store(self, key, score, kind=EXACT, depth=0):
+        '''(TranspositionTable, object, float, int, int) -> NoneType
+
+        Store score, of the given kind and found at search depth depth, for
+        key.
+
+        >>> T = TranspositionTable(max_entries=2)
+        >>> for key in 'abc':
+        ...     T.store(key, 1.0)
+        >>> sorted(T.entries)
+        ['b', 'c']
+        '''
+        if (self.max_entries is not None and key not in self.entries and
+                len(self.entries) >= self.max_entries):
+            # dicts keep insertion order, so the first key is the oldest
+            del self.entries[next(iter(self.entries))]
+        self.entries[key] = (score, kind, depth)
+
+    def clear(self):
+        '''(TranspositionTable) -> NoneType
+
+        Remove every entry from self.
+        '''
+        self.entries.clear()
+
+    def __contains__(self, key):
+        '''(TranspositionTable, object) -> bool
+
+        Return whether an exact score is stored for key.
+
+        >>> T = TranspositionTable()
+        >>> T['a'] = -1.0
+        >>> 'a' in T, T['a']
+        (True, -1.0)
+        >>> T.store('b', 0.0, UPPER)
+        >>> 'b' in T
+        False
+        '''
+        entry = self.probe(key)
+        return entry is not None and entry[1] == EXACT
+
+    def __getitem__(self, key):
+        '''(TranspositionTable, object) -> float
+
+        Return the exact score stored for key.
+        '''
+        entry = self.probe(key)
+        if entry is None or entry[1] != EXACT:
+            raise KeyError(key)
+        return entry[0]
+
+    def get(self, key, default=None):
+        '''(TranspositionTable, object, object) -> object
+
+        Return the exact score stored for key, or default if there is none.
+        The entry is probed once, so a SharedTranspositionTable slot written
+        by another process in the meantime cannot turn a found score into a
+        KeyError.
+
+        >>> T = SharedTranspositionTable(64)
+        >>> T['a'] = 0.5
+        >>> T.store('b', 0.0, LOWER)
+        >>> T.get('a'), T.get('b'), T.get('c', -1.0)
+        (0.5, None, -1.0)
+        >>> T.close()
+        '''
+        entry = self.probe(key)
+        if entry is None or entry[1] != EXACT:
+            return default
+        return entry[0]
+
+    def __setitem__(self, key, score):
+        '''(TranspositionTable, object, float) -> NoneType
+
+        Store score as the exact score for key.
+        '''
+        self.store(key, score)
+
+
+class SharedTranspositionTable(TranspositionTable):
+    '''
+    A fixed-size TranspositionTable in shared memory, for any number of
+    processes searching at once.
+
+    Each of the size slots is three 64-bit words: the score, the kind and
+    depth, and the hash of the key xor-ed with both. Writes take no lock; a
+    slot torn by two processes writing at once, or taken over by another
+    key, fails the xor check and reads as empty. A SharedTranspositionTable
+    pickles as the name of its memory block, so it can be handed to worker
+    processes, which attach to the same block.
+
+    size: int      -- number of slots
+    name: str      -- name of the shared memory block
+    '''
+
+    def __init__(self, size=1 << 20, name=None):
+        '''(SharedTranspositionTable, int, str) -> NoneType
+
+        Create a zeroed table of size slots, or attach to the existing
+        block name of size slots.
+        '''
+        from multiprocessing import shared_memory
+        self.size = size
+        if name is None:
+            self._shm = shared_memory.SharedMemory(create=True,
+                                                   size=24 * size)
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+        self.name = self._shm.name
+        self._words = self._shm.buf.cast('Q')
+        self._owner, self._closed = name is None, False
+
+    def __del__(self):
+        '''(SharedTranspositionTable) -> NoneType
+
+        Detach self from its memory block without freeing it.
+        '''
+        if not self._closed:
+            self._words.release()
+            self._shm.close()
+            self._closed = True
+
+    def __getstate__(self):
+        '''(SharedTranspositionTable) -> (int, str)
+        '''
+        return (self.size, self.name)
+
+    def __setstate__(self, state):
+        '''(SharedTranspositionTable, (int, str)) -> NoneType
+        '''
+        SharedTranspositionTable.__init__(self, *state)
+
+    def __len__(self):
+        '''(SharedTranspositionTable) -> int
+
+        Return the number of occupied slots.
+        '''
+        return sum(1 for i in range(0, 3 * self.size, 3)
+                   if self._words[i + 2] != 0)
+
+    def probe(self, key):
+        '''(SharedTranspositionTable, object) -> (float, int, int) or NoneType
+
+        Return the score, kind of score and depth stored for key, or None.
+
+        >>> T = SharedTranspositionTable(64)
+        >>> T.store('a', 0.5, UPPER, 3)
+        >>> T.probe('a')
+        (0.5, 2, 3)
+        >>> T.probe('b') is None
+        True
+        >>> T.close()
+        '''
+        h = hash_key(key)
+        i = 3 * (h % self.size)
+        words = self._words
+        score, info, check = words[i], words[i + 1], words[i + 2]
+        if check ^ score ^ info != h:
+            return None
+        return (_DOUBLE.unpack(_WORD.pack(score))[0], info & 0xff, info >> 8)
+
+    def store(self, key, score, kind=EXACT, depth=0):
+        '''(SharedTranspositionTable, object, float, int, int) -> NoneType
+
+        Store score, of the given kind and found at search depth depth, for
+        key, replacing whatever its slot held.
+        '''
+        h = hash_key(key)
+        i = 3 * (h % self.size)
+        score = _WORD.unpack(_DOUBLE.pack(score))[0]
+        info = kind | (depth << 8)
+        words = self._words
+        words[i], words[i + 1], words[i + 2] = score, info, h ^ score ^ info
+
+    def clear(self):
+        '''(SharedTranspositionTable) -> NoneType
+
+        Empty every slot of self, for every process sharing it.
+        '''
+        self._shm.buf[:] = bytes(24 * self.size)
+
+    def close(self):
+        '''(SharedTranspositionTable) -> NoneType
+
+        Detach self from its memory block, freeing the block if self
+        created it.
+        '''
+        if not self._closed:
+            self._words.release()
+            self._shm.close()
+            self._closed = True
+        if self._owner:
+            self._shm.unlink()
+
+
+def suggest_move_parallel(state, strategy, processes=2):
+    '''(GameState, Strategy, int) -> Move
+
+    Return the move strategy suggests for state, scoring the moves from
+    state in processes worker processes. strategy must be picklable and have
+    a find_score method; give it a SharedTranspositionTable so that the
+    workers share what they learn instead of repeating each other's work.
+
+    >>> from strategy_minimax_memoize import StrategyMinimaxMemoize
+    >>> from tippy_game_state import TippyGameState
+    >>> T = SharedTranspositionTable(1 << 16)
+    >>> S = StrategyMinimaxMemoize(ms_dict=T)
+    >>> b = [['o', 'o', 'o'], ['-', '-', '-'], ['x', 'x', 'x']]
+    >>> suggest_move_parallel(TippyGameState('p2', board=b), S)
+    TippyMove((1, 1))
+    >>> T.close()
+    '''
+    from multiprocessing import Pool
+    moves = state.possible_next_moves()
+    with Pool(processes) as pool:
+        scores = pool.map(_Scorer(strategy),
+                          [state.apply_move(move) for move in moves], 1)
+    # the first of the best moves, as in the strategies' suggest_move
+    best = max(range(0, len(moves)), key=lambda i: -scores[i])
+    return moves[best]
+
+
+class _Scorer:
+    '''
+    Picklable function from a state to its score under a strategy.
+
+    strategy: Strategy   -- strategy with a find_score method
+    '''
+
+    def __init__(self, strategy):
+        '''(_Scorer, Strategy) -> NoneType
+        '''
+        self.strategy = strategy
+
+    def __call__(self, state):
+        '''(_Scorer, GameState) -> float
+        '''
+        return self.strategy.find_score(state)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()